@@ -0,0 +1,68 @@
+"""
+Measure the cost of hydrated OGM objects.
+
+    python benchmarks/hydration_memory.py [count]
+
+Builds ``count`` instances the way Rehydrator does (``cls.hydrate()``),
+keeps them alive, and reports traced bytes per object and per property,
+then the throughput of trusted hydration against validated construction
+(``cls(**properties)``).
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from neoalchemy import OGMBase, Property
+from neoalchemy.validators import isodatetime
+
+
+class Person(OGMBase):
+    name = Property(primary_key=True)
+    email = Property(unique=True)
+    city = Property()
+    country = Property()
+    phone = Property()
+    age = Property(type=int)
+    height = Property(type=float)
+    joined = Property(type=isodatetime)
+
+
+def properties(i):
+    return {'name': 'person%i' % i, 'email': 'person%i@example.com' % i,
+            'city': 'Boston', 'country': 'US', 'phone': '555-%04i' % i,
+            'age': 30 + i % 50, 'height': 1.5 + (i % 50) / 100.0,
+            'joined': '2016-%02i-%02iT12:00:00' % (i % 12 + 1, i % 28 + 1)}
+
+
+def throughput(build, rows):
+    start = time.time()
+    for row in rows:
+        build(row)
+    return len(rows) / (time.time() - start)
+
+
+def main(count=100000):
+    rows = [properties(i) for i in range(count)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [Person.hydrate(row) for row in rows]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+
+    per_object = used / float(count)
+    print('objects:                 %i' % count)
+    print('bytes per object:        %.0f' % per_object)
+    print('bytes per property:      %.0f' %
+          (per_object / len(Person.__node__.keys())))
+    print('hydrated per second:     %.0f' % throughput(Person.hydrate, rows))
+    print('constructed per second:  %.0f' %
+          throughput(lambda row: Person(**row), rows))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
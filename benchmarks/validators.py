@@ -0,0 +1,46 @@
+"""
+Measure date validator throughput.
+
+    python benchmarks/validators.py [count]
+
+Reports values per second for ISO-8601 input (the strict fast path),
+free-form input (the dateutil fallback) and repeated values through a
+memoized validator.
+"""
+import sys
+import time
+
+import dateutil.parser
+
+from neoalchemy.validators import isodate, isodatetime, memoize
+
+
+def throughput(validator, values):
+    start = time.time()
+    for value in values:
+        validator(value)
+    return len(values) / (time.time() - start)
+
+
+def main(count=50000):
+    iso = ['2016-%02i-%02iT%02i:30:00' % (i % 12 + 1, i % 28 + 1, i % 24)
+           for i in range(count)]
+    fuzzy = ['%02i/%02i/2016 %i:30 PM' % (i % 12 + 1, i % 28 + 1, i % 12 + 1)
+             for i in range(count)]
+    repeated = [fuzzy[i % 100] for i in range(count)]
+
+    cases = [
+        ('dateutil.parser.parse, ISO', lambda v: dateutil.parser.parse(v),
+         iso),
+        ('isodatetime, ISO', isodatetime, iso),
+        ('isodate, ISO', isodate, iso),
+        ('isodatetime, free-form', isodatetime, fuzzy),
+        ('memoize(isodatetime), 100 distinct', memoize(isodatetime),
+         repeated),
+    ]
+    for name, validator, values in cases:
+        print('%-36s %10.0f values/s' % (name, throughput(validator, values)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -1,5 +1,6 @@
 from .cypher import Create, Match, Merge
 from .graph import Graph
-from .ogm import OGMBase, OneToManyRelation, ManyToManyRelation
+from .ogm import (OGMBase, OGMSession, OneToManyRelation,
+                  ManyToManyRelation)
 from .primitives import Node, Relationship
 from .shared.objects import Property
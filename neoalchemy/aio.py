@@ -0,0 +1,101 @@
+"""
+asyncio support for NeoAlchemy (Python 3.5+).
+
+The Bolt driver is blocking, so calls are handed off to a thread pool and
+awaited from the event loop. The pool's worker count bounds how many
+queries run at once; by default it matches the graph's session pool.
+
+A call's worker may block waiting for a pooled session, and the sessions
+it waits for are often held by open streams. So records are pulled from
+streams on a second thread pool, which never waits for sessions, and an
+open stream can always be drained to free its session.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from itertools import islice
+
+
+class AsyncBridge(object):
+    """
+    Run blocking NeoAlchemy calls on a bounded thread pool, and pull
+    records from open streams on another.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = int(max_workers)
+        self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.__stream_executor = ThreadPoolExecutor(
+            max_workers=self.max_workers)
+
+    def run(self, fn, *args, **kw):
+        """Run fn(*args, **kw) on the thread pool, returning a Future"""
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.__executor,
+                                    functools.partial(fn, *args, **kw))
+
+    def fetch(self, fn, *args, **kw):
+        """
+        Run fn(*args, **kw), which must only read from a stream that is
+        already open and never acquire a session, on the stream pool.
+        """
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.__stream_executor,
+                                    functools.partial(fn, *args, **kw))
+
+    def limit(self, concurrency):
+        """
+        A view of this bridge which lets at most concurrency calls be in
+        flight at once. Give one to each request handler so that a single
+        handler can't fill the thread pool and starve the others.
+        """
+        return AsyncLimiter(self, concurrency)
+
+    def shutdown(self, wait=True):
+        self.__executor.shutdown(wait=wait)
+        self.__stream_executor.shutdown(wait=wait)
+
+
+class AsyncLimiter(object):
+    def __init__(self, bridge, concurrency):
+        self.__bridge = bridge
+        self.__semaphore = asyncio.Semaphore(int(concurrency))
+
+    async def run(self, fn, *args, **kw):
+        async with self.__semaphore:
+            return await self.__bridge.run(fn, *args, **kw)
+
+
+class AsyncIterator(object):
+    """
+    Iterate a blocking iterator (e.g. a Rehydrator) from the event loop,
+    pulling up to prefetch items per trip to the stream thread pool.
+
+    If the iterator has to acquire a session before it can be read (e.g.
+    a MatchQuery), pass start instead: a callable run once on the main
+    thread pool, which returns the iterator to read.
+    """
+    PREFETCH = 100
+
+    def __init__(self, iterator, bridge, prefetch=None, start=None):
+        self.__iterator = iterator
+        self.__bridge = bridge
+        self.__prefetch = prefetch or self.PREFETCH
+        self.__buffer = deque()
+        self.__start = start
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.__start is not None:
+            start, self.__start = self.__start, None
+            self.__iterator = await self.__bridge.run(start)
+        if not self.__buffer:
+            self.__buffer.extend(await self.__bridge.fetch(self.__take))
+            if not self.__buffer:
+                raise StopAsyncIteration
+        return self.__buffer.popleft()
+
+    def __take(self):
+        return list(islice(self.__iterator, self.__prefetch))
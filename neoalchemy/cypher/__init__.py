@@ -1,3 +1,4 @@
-from .verbs import Create, Match, Merge
+from .cache import QueryCache, QueryTemplate
+from .verbs import Create, Match, Merge, UnwindRows
 from .operations import (All, Any, Avg, Collect, Count, Distinct, Exists,
                          Max, Min, None_, Single, Sum, Unwind)
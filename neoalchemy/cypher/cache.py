@@ -0,0 +1,94 @@
+"""
+Caching of compiled Cypher so that queries of the same shape are only
+built once and later calls just bind fresh parameter values.
+"""
+from collections import OrderedDict
+import threading
+
+
+class QueryTemplate(object):
+    """
+    The text of a compiled CypherQuery plus a recipe mapping each of its
+    parameters back to the (graph object, property) it was taken from.
+    """
+    def __init__(self, query, **graph_objs):
+        self.query = str(query)
+        sources = {prop.param: (name, key)
+                   for name, graph_obj in graph_objs.items()
+                   for key, prop in graph_obj.items()}
+        try:
+            self.recipe = tuple((param, ) + sources[param]
+                                for param in query.params)
+        except KeyError:
+            # parameters not drawn directly from a property (e.g. renamed
+            # paramN collisions) can't be rebound, so don't cache
+            self.recipe = None
+
+    @property
+    def cacheable(self):
+        return self.recipe is not None
+
+    def bind(self, **graph_objs):
+        """Return the query text and its parameters for the given objects"""
+        return self.query, {param: graph_objs[name][key].value
+                            for param, name, key in self.recipe}
+
+
+class QueryCache(object):
+    """A bounded LRU cache of QueryTemplates with hit/miss counters"""
+    MAX_SIZE = 512
+
+    def __init__(self, max_size=None):
+        self.max_size = self.MAX_SIZE if max_size is None else int(max_size)
+        self.__templates = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self.__lock:
+            try:
+                template = self.__templates.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.__templates[key] = template
+            self.hits += 1
+            return template
+
+    def put(self, key, template):
+        if not template.cacheable or self.max_size < 1:
+            return template
+        with self.__lock:
+            self.__templates.pop(key, None)
+            self.__templates[key] = template
+            while len(self.__templates) > self.max_size:
+                self.__templates.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def template(self, key, build, **graph_objs):
+        """
+        Fetch the template cached under key, or build, compile and cache
+        it. Returns (query, params) bound to graph_objs.
+        """
+        template = self.get(key)
+        if template is not None:
+            return template.bind(**graph_objs)
+
+        query = build()
+        self.put(key, QueryTemplate(query, **graph_objs))
+        return str(query), dict(query.params)
+
+    def clear(self):
+        with self.__lock:
+            self.__templates.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self):
+        return {'size': len(self), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def __len__(self):
+        return len(self.__templates)
@@ -14,14 +14,29 @@ class QueryParams(dict):
     def last_key(self):
         return self.__last_key
 
-    def __setitem__(self, key, value):
-        if self.get(key, object()) == value:
-            return 
-        if key is None or self.get(str(key)) is not None:
+    def add(self, key, value):
+        """
+        Add a parameter and return the name it was stored under. That is
+        key itself, unless key is None or already holds a different value,
+        in which case the next free paramN is allocated.
+        """
+        if key is not None:
+            key = str(key)
+            if self.get(key, object()) == value:
+                self.__last_key = key
+                return key
+        if key is None or key in self:
             key = 'param%i' % self.__extra_params
+            while key in self:
+                self.__extra_params += 1
+                key = 'param%i' % self.__extra_params
             self.__extra_params += 1
-        self.__last_key = str(key)
-        super(QueryParams, self).__setitem__(self.__last_key, value)
+        self.__last_key = key
+        super(QueryParams, self).__setitem__(key, value)
+        return key
+
+    def __setitem__(self, key, value):
+        self.add(key, value)
 
     def update(self, mapping):
         for key, value in mapping.items():
@@ -29,42 +44,35 @@ class QueryParams(dict):
 
 
 class CypherExpression(object):
+    """
+    An expression which renders to Cypher text plus parameters. It is
+    rendered once, by compile(), into the QueryParams of the query it is
+    added to (or its own), which hands out unique parameter names as it
+    goes; the text never needs rewriting afterwards.
+    """
     def __init__(self):
         self.__compiled = False
         self.__expr = self.__var = None
         self.params = QueryParams()
 
-    def compile(self):
+    def compile(self, params=None):
+        if params is not None and params is not self.params:
+            self.params = params
+        elif self.__compiled:
+            return self
+        self.__expr, self.__var = self.render(self.params)
         self.__compiled = True
         return self
 
-    def replace(self, old, new):
-        self.__expr = self.__expr.replace(old, new)
-
-    @property
-    def expr(self):
-        if self.__compiled:
-            raise AttributeError("'%s' object has no attribute 'expr'" %
-                                 self.__class__.__name__)
-        return self.__expr
-
-    @expr.setter
-    def expr(self, value):
-        if self.__compiled:
-            raise AttributeError("Can't set attribute")
-        self.__expr = value
+    def render(self, params):
+        """Return this expression's text and variable, adding to params"""
+        raise NotImplementedError
 
     @property
     def var(self):
         if not self.__compiled: self.compile()
         return self.__var
 
-    @var.setter
-    def var(self, value):
-        if self.__compiled:
-            raise AttributeError("Can't set attribute")
-        self.__var = value
-
     def __str__(self):
         if not self.__compiled: self.compile()
         return self.__expr
@@ -147,6 +155,24 @@ class CypherOperatorInterface(object):
         return ComparisonExpression(self, '.*%s.*' % x, '=~')
 
 
+class CypherVariable(CypherOperatorInterface):
+    """
+    A bare Cypher variable such as the ``row`` bound by ``UNWIND``.
+    Item access yields nested variables, e.g. ``row['name']`` => ``row.name``.
+    """
+    def __init__(self, var):
+        self.var = var
+
+    def __getitem__(self, key):
+        return CypherVariable('%s.%s' % (self.var, key))
+
+    def __str__(self):
+        return self.var
+
+    def __hash__(self):
+        return hash(self.var)
+
+
 class ComparisonExpression(CypherExpression, CypherOperatorInterface):
     def __init__(self, left_operand, right_operand, operator, reverse=False):
         super(ComparisonExpression, self).__init__()
@@ -155,29 +181,27 @@ class ComparisonExpression(CypherExpression, CypherOperatorInterface):
         self.__operator = operator
         self.__reverse = reverse
 
-    def compile(self):
-        if not isinstance(self.__right_operand, CypherOperatorInterface):
-            if isinstance(self.__left_operand, ComparisonExpression):
-                var = str(self.__left_operand)
-                self.params.update(self.__left_operand.params)
-            else:
-                var = self.__left_operand.var
-
-            if self.__right_operand is not None:
-                value = self.__left_operand.type(self.__right_operand)
-            else:
-                value = None
-
-            self.params[getattr(self.__left_operand, 'param', None)] = value
-            self.var = var
-            expr = (var, self.__operator, '{%s}' % self.params.last_key)
+    def render(self, params):
+        left = self.__render_operand(self.__left_operand, params)
+        right = self.__right_operand
+        if isinstance(right, CypherOperatorInterface):
+            var = None
+            right = self.__render_operand(right, params)
         else:
-            expr = (self.__left_operand.var, self.__operator,
-                    self.__right_operand.var)
+            var = left
+            if right is not None:
+                right = self.__left_operand.type(right)
+            key = getattr(self.__left_operand, 'param', None)
+            right = '{%s}' % params.add(key, right)
 
-        self.expr = ' '.join(reversed(expr) if self.__reverse else expr)
-        super(ComparisonExpression, self).compile()
-        return self
+        expr = (left, self.__operator, right)
+        return ' '.join(reversed(expr) if self.__reverse else expr), var
+
+    @staticmethod
+    def __render_operand(operand, params):
+        if isinstance(operand, CypherExpression):
+            return str(operand.compile(params))
+        return operand.var
 
     def type(self, other):
         return other
@@ -189,15 +213,10 @@ class Exists(CypherExpression):
         self.__exists = exists
         self.__rel = rel
 
-    def compile(self):
-        if self.__exists:
-            self.expr = 'EXISTS(%s)'
-        else:
-            self.expr = 'NOT EXISTS(%s)'
-        self.expr %= self.__rel.pattern()
-        self.var = self.expr + ' AS %s_exists' % self.__rel.var
-        super(Exists, self).compile()
-        return self
+    def render(self, params):
+        expr = ('EXISTS(%s)' if self.__exists else 'NOT EXISTS(%s)')
+        expr %= self.__rel.pattern()
+        return expr, expr + ' AS %s_exists' % self.__rel.var
 
 
 class CypherFunction(object):
@@ -1,13 +1,19 @@
 from __future__ import unicode_literals
 
+import re
+
 import six
 
 from ..shared.objects import Property
-from .operations import CypherExpression, ComparisonExpression, QueryParams
+from .operations import (CypherExpression, CypherVariable,
+                         ComparisonExpression, QueryParams)
+
+
+PARAM = re.compile(r'\{(\w+)\}')
 
 
 class CypherQuery(list):
-    def __init__(self, graph_obj, use_full_pattern=False):
+    def __init__(self, graph_obj, use_full_pattern=False, row=None):
         self.params = QueryParams()
 
         try:
@@ -15,7 +21,7 @@ class CypherQuery(list):
         except AttributeError:
             verb = self.__class__.__name__.upper()
 
-        pattern = graph_obj.pattern(inline_props=use_full_pattern)
+        pattern = graph_obj.pattern(inline_props=use_full_pattern, row=row)
         super(CypherQuery, self).__init__(['%s %s' % (verb, pattern)])
 
     def delete(self, *args, **kw):
@@ -81,54 +87,90 @@ class CypherQuery(list):
             if not isinstance(expr, CypherExpression):
                 raise ValueError('Must be CypherExpression or Property')
 
-        for key, value in expr.compile().params.items():
-            self.params[key] = value
-            if self.params.last_key.startswith('param'):
-                expr.replace(key, self.params.last_key)
-
-        return str(expr)
+        return str(expr.compile(self.params))
 
     def __str__(self):
         return '\n'.join(map(str, self))
 
+    def _extend(self, query):
+        """
+        Append another query's statements and parameters. Its parameters
+        are allocated names in ours, and any that had to be renamed to
+        avoid a clash are renamed in its statements as well.
+        """
+        renamed = {}
+        for key, value in query.params.items():
+            name = self.params.add(key, value)
+            if name != key:
+                renamed[key] = name
+
+        def rename(match):
+            return '{%s}' % renamed.get(match.group(1), match.group(1))
+
+        if renamed:
+            self.extend(PARAM.sub(rename, str(stmt)) for stmt in query)
+        else:
+            self.extend(query)
+
     def __and__(self, query):
-        self.extend(query)
-        self.params.update(query.params)
+        self._extend(query)
         return self
 
     def __or__(self, query):
         self.append('UNION ALL')
-        self.extend(query)
-        self.params.update(query.params)
+        self._extend(query)
         return self
 
     def __xor__(self, query):
         self.append('UNION')
-        self.extend(query)
-        self.params.update(query.params)
+        self._extend(query)
         return self
 
 
+class UnwindRows(CypherQuery):
+    """
+    UNWIND a list of parameter maps so that the verbs which follow run
+    once per row. Pass ``unwind.row`` to those verbs as their ``row``.
+    Its row_count is the number of rows.
+    """
+    def __init__(self, rows, var='row'):
+        self.params = QueryParams()
+        self.params['%ss' % var] = rows = list(rows)
+        self.row_count = len(rows)
+        self.row = CypherVariable(var)
+        super(CypherQuery, self).__init__(['UNWIND {%s} AS %s' %
+                                           (self.params.last_key, var)])
+
+
 class Create(CypherQuery):
-    def __init__(self, graph_obj):
+    def __init__(self, graph_obj, row=None):
         super(Create, self).__init__(graph_obj)
-        self.set(*graph_obj.values())
+        if row is None:
+            self.set(*graph_obj.values())
+        else:
+            self.set(ComparisonExpression(graph_obj, row, '='))
 
 
 class Match(CypherQuery):
-    def __init__(self, graph_obj, optional=False):
+    def __init__(self, graph_obj, optional=False, row=None):
         if optional:
             self.verb = 'OPTIONAL MATCH'
         super(Match, self).__init__(graph_obj)
-        self.where(*(v for k, v in graph_obj.items()
-                     if k in graph_obj.bound_keys))
+        if row is None:
+            self.where(*(v for k, v in graph_obj.items()
+                         if k in graph_obj.bound_keys))
+        else:
+            self.where(*(v == row[k] for k, v in graph_obj.items()
+                         if k in graph_obj.bound_keys))
 
 
 class Merge(CypherQuery):
-    def __init__(self, graph_obj):
-        super(Merge, self).__init__(graph_obj, use_full_pattern=True)
-        self.params.update({p.param: p.value for k, p in graph_obj.items()
-                            if k in graph_obj.bound_keys})
+    def __init__(self, graph_obj, row=None):
+        super(Merge, self).__init__(graph_obj, use_full_pattern=True, row=row)
+        if row is None:
+            self.params.update({p.param: p.value
+                                for k, p in graph_obj.items()
+                                if k in graph_obj.bound_keys})
 
     def on_create(self):
         self.append('ON CREATE')
@@ -19,3 +19,10 @@ class UnboundedWriteOperation(RuntimeError):
         if error_info:
             error = '%s %s' % (error, error_info)
         super(UnboundedWriteOperation, self).__init__(error)
+
+
+class PartialObjectError(RuntimeError):
+    def __init__(self, obj, missing, action='write'):
+        error = "Can't %s partially loaded %s object. Not loaded: %s."
+        error %= (action, obj.__class__.__name__, ', '.join(sorted(missing)))
+        super(PartialObjectError, self).__init__(error)
@@ -2,7 +2,13 @@
 A thin wrapper around the Neo4J Bolt driver's GraphDatabase class
 providing a convenient auto-connection during initialization.
 """
-from collections import deque, namedtuple
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+import logging
+import re
+import threading
+import time
 import warnings
 
 from neo4j.v1 import (GraphDatabase, basic_auth, Record,
@@ -11,34 +17,150 @@ from neo4j.v1 import (GraphDatabase, basic_auth, Record,
 from .primitives import Node, Relationship
 
 
+slow_query_log = logging.getLogger('neoalchemy.slow_query')
+
+GENERATED_PARAM = re.compile(r'\{param\d+\}')
+PAGING_LITERAL = re.compile(r'\b(LIMIT|SKIP)\s+\d+\b', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(query):
+    """
+    Normalize a query's text so that runs of the same query shape compare
+    equal: parameter names generated by QueryParams (paramN) and literal
+    LIMIT and SKIP values are replaced with ?, and whitespace is collapsed.
+    """
+    query = GENERATED_PARAM.sub('{?}', query)
+    query = PAGING_LITERAL.sub(r'\1 ?', query)
+    return WHITESPACE.sub(' ', query).strip()
+
+
 class Rehydrator(object):
-    def __init__(self, statement_result, graph):
+    """
+    Hydrate a StatementResult into OGM objects as it is iterated.
+
+    If on_close is given, the Rehydrator owns whatever resource backs the
+    result (usually a pooled session) and calls on_close(exhausted) once,
+    either when the records run out or when close() is called early.
+
+    If log_entry is given, the time spent waiting for each record and
+    hydrating it is added to that QueryLog entry, which is finished when
+    the Rehydrator closes.
+    """
+    def __init__(self, statement_result, graph, on_close=None,
+                 log_entry=None):
         self.__result_set = iter(statement_result)
-        self.__schema = dict(graph.schema.classes)
+        self.__graph = graph
+        self.__schema = graph.schema
+        self.__identity_map = graph.identity_map
+        self.__on_close = on_close
+        self.__log_entry = log_entry
+        self.__prefetched = ()
+        self.__partial = None
 
     def __iter__(self):
         return self
 
+    def __aiter__(self):
+        from .aio import AsyncIterator
+        return AsyncIterator(self, self.__graph.aio)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def close(self, exhausted=False):
+        """Stop iterating and release the underlying session, if any"""
+        on_close, self.__on_close = self.__on_close, None
+        log_entry, self.__log_entry = self.__log_entry, None
+        try:
+            if on_close is not None:
+                on_close(exhausted)
+        finally:
+            if log_entry is not None:
+                if exhausted and log_entry.rows is None:
+                    log_entry.rows = 0
+                log_entry.finish()
+
     def __next__(self):
-        record = next(self.__result_set)
-        values = []
-        for value in record.values():
-            if isinstance(value, NeoNode):
-                try:
-                    cls = self.__schema[tuple(value.labels)]
-                except KeyError:
-                    values.append(Node(*value.labels, **value.properties))
-                else:
-                    values.append(cls(**value.properties))
-            elif isinstance(value, NeoRelationship):
-                values.append(Relationship(value.type, **value.properties))
-            else:
-                values.append(value)
+        log_entry = self.__log_entry
+        started = time.time() if log_entry is not None else None
+        try:
+            record = next(self.__result_set)
+        except StopIteration:
+            self.__fetched(log_entry, started)
+            self.close(exhausted=True)
+            raise
+        except:
+            self.__fetched(log_entry, started)
+            self.close()
+            raise
+        if log_entry is None:
+            return self.__hydrate_record(record)
+        fetched = time.time()
+        record = self.__hydrate_record(record)
+        log_entry.record(fetched - started, time.time() - fetched)
+        return record
+
+    @staticmethod
+    def __fetched(log_entry, started):
+        if log_entry is not None:
+            log_entry.fetch += time.time() - started
+
+    def __hydrate_record(self, record):
+        values = [self.__hydrate(value) for value in record.values()]
+        if self.__partial is not None:
+            values[0] = self.__partial.hydrate(values[0], partial=True)
+        if self.__prefetched:
+            obj = values[0]
+            for relation, related in zip(self.__prefetched, values[1:]):
+                obj.__related__[relation] = related
+            return Record(record.keys()[:1], values[:1])
         return Record(record.keys(), values)
 
     def next(self):
         return self.__next__()
 
+    def prefetched(self, *relations):
+        """
+        Treat each column after the first as the collected related nodes
+        for one of the given (rel_type, rev) relations. They are attached
+        to the object in the first column instead of being returned.
+        """
+        self.__prefetched = relations
+        return self
+
+    def partial(self, cls):
+        """
+        Treat the first column as a map of some of an OGM class's
+        properties, and build a partially loaded instance from each.
+        """
+        self.__partial = cls
+        return self
+
+    def __hydrate(self, value):
+        if isinstance(value, NeoNode):
+            cls = self.__schema.resolve(value.labels)
+            if cls is None:
+                return Node(*value.labels, **value.properties)
+            obj = cls.hydrate(value.properties)
+            if self.__identity_map is not None:
+                obj = self.__identity_map.intern(obj)
+            return obj
+        elif isinstance(value, NeoRelationship):
+            return Relationship(value.type, **value.properties)
+        elif isinstance(value, list):
+            return [self.__hydrate(item) for item in value]
+        return value
+
     @property
     def one(self):
         try:
@@ -52,6 +174,8 @@ class Rehydrator(object):
                 pass
             else:
                 warnings.warn('More than one result returned. Data discarded!')
+            finally:
+                self.close()
 
         if len(record.keys()) > 1:
             return record
@@ -59,15 +183,538 @@ class Rehydrator(object):
             return record[0]
 
 
+class LatencyHistogram(object):
+    """
+    Counts of query times in log-scale buckets. Each bucket is named by
+    its upper bound in milliseconds; the last one catches everything, so
+    the slowest time seen (max, in milliseconds) stands in for its bound.
+    """
+    BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+              float('inf'))
+
+    def __init__(self):
+        self.counts = [0] * len(self.BOUNDS)
+        self.total = self.max = 0.0
+
+    def add(self, elapsed):
+        ms = elapsed * 1000
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(self.BOUNDS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.total += elapsed
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def buckets(self):
+        """(upper bound in ms, count) pairs"""
+        return list(zip(self.BOUNDS, self.counts))
+
+    def percentile(self, p):
+        """The upper bound (in ms) of the bucket holding percentile p"""
+        target = self.count * p / 100.0
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return 0
+
+
+class StatementStats(object):
+    """Totals for every run of one query fingerprint"""
+    def __init__(self, fingerprint, query):
+        self.fingerprint = fingerprint
+        self.query = query
+        self.calls = self.rows = 0
+        self.histogram = LatencyHistogram()
+
+    @property
+    def total_time(self):
+        return self.histogram.total
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def p99(self):
+        """An upper bound on the 99th percentile time, in seconds"""
+        return self.histogram.percentile(99) / 1000.0
+
+    def __repr__(self):
+        return ('StatementStats(%r, calls=%i, total_time=%.3f, rows=%i)' %
+                (self.fingerprint, self.calls, self.total_time, self.rows))
+
+
+class QueryStats(object):
+    """
+    Calls, time and rows for each query fingerprint, like Postgres's
+    pg_stat_statements. Only the MAX_SIZE most recently run fingerprints
+    are kept, so rare queries are forgotten first.
+    """
+    MAX_SIZE = 1000
+
+    def __init__(self):
+        self.__stats = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def add(self, entry):
+        """Count a finished QueryLog entry"""
+        with self.__lock:
+            stats = self.__stats.pop(entry.fingerprint, None)
+            if stats is None:
+                stats = StatementStats(entry.fingerprint, entry.query)
+            self.__stats[entry.fingerprint] = stats
+            while len(self.__stats) > self.MAX_SIZE:
+                self.__stats.popitem(last=False)
+            stats.calls += 1
+            stats.rows += entry.rows or 0
+            stats.histogram.add(entry.time)
+
+    def add_rows(self, fingerprint, rows):
+        """Count rows read after their query was counted"""
+        with self.__lock:
+            stats = self.__stats.get(fingerprint)
+            if stats is not None:
+                stats.rows += rows
+
+    def top(self, n=10, by='total_time'):
+        """The n fingerprints with the most calls, total_time, rows, etc."""
+        return sorted(self, key=lambda stats: getattr(stats, by),
+                      reverse=True)[:n]
+
+    def clear(self):
+        with self.__lock:
+            self.__stats.clear()
+
+    def __getitem__(self, query):
+        return self.__stats[fingerprint(query)]
+
+    def __contains__(self, query):
+        return fingerprint(query) in self.__stats
+
+    def __iter__(self):
+        with self.__lock:
+            return iter(list(self.__stats.values()))
+
+    def __len__(self):
+        return len(self.__stats)
+
+
+class LogLine(object):
+    """
+    One query in the QueryLog. time is the wall time from sending the query
+    to its last record, or to its return from run(), which buffers every
+    record first. first_record, fetch (total time waiting on the driver)
+    and hydration are only measured for streamed queries, as they are
+    iterated. Times are in seconds and are None until known.
+    """
+    __slots__ = ('query', 'params', 'time', 'first_record', 'fetch',
+                 'hydration', 'rows', 'started', 'fingerprint', '_log')
+
+    def __init__(self, log, query, params, elapsed=None):
+        self.query = query
+        self.params = params
+        self.time = elapsed
+        self.first_record = self.rows = self.fingerprint = None
+        self.fetch = self.hydration = 0.0
+        self.started = time.time()
+        self._log = log
+
+    def record(self, fetch, hydration):
+        """Add the timings of one streamed record"""
+        if self.first_record is None:
+            self.first_record = time.time() - self.started - hydration
+        self.rows = (self.rows or 0) + 1
+        self.fetch += fetch
+        self.hydration += hydration
+
+    def add_rows(self, rows):
+        """Add rows read from a result after it was returned"""
+        self.rows = (self.rows or 0) + rows
+        if self.fingerprint is not None:
+            self._log.stats.add_rows(self.fingerprint, rows)
+
+    def finish(self):
+        """Stop the clock, if it isn't already, and report to the log"""
+        if self.fingerprint is not None:
+            return
+        if self.time is None:
+            self.time = time.time() - self.started
+        self.fingerprint = fingerprint(self.query)
+        self._log.finished(self)
+
+    def __repr__(self):
+        return 'LogLine(query=%r, params=%r, time=%r, rows=%r)' % (
+            self.query, self.params, self.time, self.rows)
+
+
 class QueryLog(deque):
+    """
+    The most recent queries run on a graph, with their timings. Finished
+    queries are also counted in stats, by fingerprint, and any taking at
+    least slow_threshold seconds are kept in slow and logged as a warning
+    to the neoalchemy.slow_query logger.
+    """
     MAX_SIZE = 100
-    LogLine = namedtuple('LogLine', ('query', 'params'))
+    LogLine = LogLine
 
-    def __init__(self, *args, **kw):
+    def __init__(self, slow_threshold=None, *args, **kw):
         super(QueryLog, self).__init__(maxlen=self.MAX_SIZE, *args, **kw)
+        self.slow_threshold = slow_threshold
+        self.slow = deque(maxlen=self.MAX_SIZE)
+        self.stats = QueryStats()
+
+    def __call__(self, query, params, elapsed=None):
+        entry = self.LogLine(self, query, params, elapsed)
+        self.append(entry)
+        if elapsed is not None:
+            entry.finish()
+        return entry
+
+    def finished(self, entry):
+        self.stats.add(entry)
+        threshold = self.slow_threshold
+        if threshold is not None and entry.time >= threshold:
+            self.slow.append(entry)
+            slow_query_log.warning(
+                'Slow query (%.1f ms, %s rows, %.1f ms hydrating): %s',
+                entry.time * 1000, entry.rows, entry.hydration * 1000,
+                entry.query)
+
+
+class LoggedResult(object):
+    """
+    A result returned by Query.run, which counts the rows of its QueryLog
+    entry as they are read. Anything else is passed on to the result.
+    """
+    def __init__(self, result, log_entry):
+        self.__result = result
+        self.__log_entry = log_entry
+
+    def __iter__(self):
+        rows = 0
+        try:
+            for record in self.__result:
+                rows += 1
+                yield record
+        finally:
+            self.__log_entry.add_rows(rows)
+
+    def __getattr__(self, name):
+        return getattr(self.__result, name)
+
+
+class QueryPlan(object):
+    """
+    The plan Neo4J chose for a query, from EXPLAIN, or the plan it ran
+    along with what each step actually cost, from PROFILE. steps lists
+    every operator depth-first from the root, which produces the results.
+    rows and db_hits are None unless the query was profiled.
+    """
+    Step = namedtuple('Step', ('operator', 'depth', 'identifiers',
+                               'estimated_rows', 'rows', 'db_hits',
+                               'arguments'))
+    LABEL_SCANS = ('NodeByLabelScan',)
+    ALL_NODES_SCANS = ('AllNodesScan',)
+    CARTESIAN_PRODUCTS = ('CartesianProduct',)
+
+    def __init__(self, query, params, plan):
+        self.query = query
+        self.params = params
+        self.plan = plan
+        self.profiled = hasattr(plan, 'db_hits')
+        self.steps = []
+        self.__walk(plan, 0)
+
+    def __walk(self, plan, depth):
+        arguments = plan.arguments or {}
+        self.steps.append(self.Step(
+            operator=plan.operator_type.split('@')[0], depth=depth,
+            identifiers=tuple(plan.identifiers),
+            estimated_rows=arguments.get('EstimatedRows'),
+            rows=getattr(plan, 'rows', None),
+            db_hits=getattr(plan, 'db_hits', None), arguments=arguments))
+        for child in plan.children:
+            self.__walk(child, depth + 1)
+
+    @property
+    def operators(self):
+        return [step.operator for step in self.steps]
+
+    @property
+    def estimated_rows(self):
+        return self.steps[0].estimated_rows
+
+    @property
+    def rows(self):
+        return self.steps[0].rows
+
+    @property
+    def db_hits(self):
+        if self.profiled:
+            return sum(step.db_hits for step in self.steps)
+
+    @property
+    def label_scans(self):
+        """Steps reading every node with a label, rather than an index"""
+        return self.__find(self.LABEL_SCANS)
+
+    @property
+    def all_nodes_scans(self):
+        """Steps reading every node in the graph"""
+        return self.__find(self.ALL_NODES_SCANS)
+
+    @property
+    def cartesian_products(self):
+        """Steps pairing every row of one input with every row of another"""
+        return self.__find(self.CARTESIAN_PRODUCTS)
+
+    def __find(self, operators):
+        return [step for step in self.steps if step.operator in operators]
+
+    def __str__(self):
+        lines = []
+        for step in self.steps:
+            costs = ['estimated rows: %s' % step.estimated_rows]
+            if self.profiled:
+                costs += ['rows: %s' % step.rows,
+                          'db hits: %s' % step.db_hits]
+            lines.append('%s%s (%s)' % ('  ' * step.depth, step.operator,
+                                        ', '.join(costs)))
+        return '\n'.join(lines)
+
+
+class SessionPool(object):
+    """
+    A bounded pool of Bolt sessions which are reused between queries
+    rather than opened and closed for each one.
+    """
+    Stats = namedtuple('Stats', ('size', 'in_use', 'idle', 'acquired',
+                                 'waits', 'wait_time'))
+
+    def __init__(self, graph, size=10, idle_timeout=300, warm_up=0,
+                 acquire_timeout=30):
+        self.__graph = graph
+        self.size = int(size)
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.__idle = deque()
+        self.__in_use = 0
+        self.__acquired = self.__waits = 0
+        self.__wait_time = 0.0
+        self.__lock = threading.Condition()
+        if warm_up:
+            self.warm_up(warm_up)
+
+    def acquire(self, timeout=None):
+        """
+        Borrow a session, waiting up to timeout seconds (by default, the
+        pool's acquire_timeout) for one to be released if the pool is
+        exhausted. An acquire_timeout of None waits forever.
+
+        Streamed results hold their session until they are exhausted or
+        closed, so keeping more streams open than the pool has sessions
+        (e.g. by nesting OGM matches) raises here instead of hanging.
+        """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        with self.__lock:
+            if self.__in_use >= self.size:
+                self.__waits += 1
+                started = time.time()
+                while self.__in_use >= self.size:
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.time() - started)
+                        if remaining <= 0:
+                            self.__wait_time += time.time() - started
+                            raise RuntimeError(
+                                'Timed out waiting for a session from the '
+                                'pool; %i are in use.' % self.__in_use)
+                    self.__lock.wait(remaining)
+                self.__wait_time += time.time() - started
+            self.__evict_idle()
+            session = None
+            while self.__idle and session is None:
+                session, _ = self.__idle.pop()
+                if not session.healthy:
+                    session = None
+            self.__in_use += 1
+            self.__acquired += 1
+
+        if session is None:
+            try:
+                session = self.__graph.driver.session()
+            except:
+                self.__release_slot()
+                raise
+        return session
+
+    def release(self, session, discard=False):
+        """
+        Return a borrowed session to the pool. Unless it is being
+        discarded, any records still pending are fetched first, so errors
+        from the server (e.g. a CypherError) are raised here, and the
+        session is then discarded rather than reused.
+        """
+        try:
+            result, session.last_result = session.last_result, None
+            if result is not None and not discard:
+                try:
+                    result.buffer()
+                except:
+                    discard = True
+                    raise
+        finally:
+            if discard or not session.healthy:
+                self.__close(session)
+            else:
+                with self.__lock:
+                    self.__idle.append((session, time.time()))
+            self.__release_slot()
 
-    def __call__(self, query, params):
-        self.append(self.LogLine(query=query, params=params))
+    @contextmanager
+    def session(self, timeout=None):
+        """Borrow a session for the duration of a with block"""
+        session = self.acquire(timeout)
+        try:
+            yield session
+        except:
+            self.release(session, discard=True)
+            raise
+        else:
+            self.release(session)
+
+    def warm_up(self, count=None):
+        """Open sessions ahead of time so the first queries don't wait"""
+        count = self.size if count is None else min(int(count), self.size)
+        sessions = [self.acquire() for _ in range(count)]
+        for session in sessions:
+            self.release(session)
+
+    def evict_idle(self):
+        """Close sessions which have sat idle longer than idle_timeout"""
+        with self.__lock:
+            self.__evict_idle()
+
+    def close(self):
+        """Close all idle sessions"""
+        with self.__lock:
+            while self.__idle:
+                self.__close(self.__idle.popleft()[0])
+
+    @property
+    def stats(self):
+        with self.__lock:
+            return self.Stats(size=self.size, in_use=self.__in_use,
+                              idle=len(self.__idle), acquired=self.__acquired,
+                              waits=self.__waits, wait_time=self.__wait_time)
+
+    def __evict_idle(self):
+        if self.idle_timeout is None:
+            return
+        expired = time.time() - self.idle_timeout
+        while self.__idle and self.__idle[0][1] < expired:
+            self.__close(self.__idle.popleft()[0])
+
+    def __release_slot(self):
+        with self.__lock:
+            self.__in_use -= 1
+            self.__lock.notify()
+
+    @staticmethod
+    def __close(session):
+        try:
+            session.connection.close()
+        except Exception:
+            pass
+
+
+class Transaction(object):
+    """
+    Run every query issued through graph.query from the current thread
+    inside one Bolt transaction for the duration of a with block. The
+    transaction commits if the block succeeds and rolls back otherwise.
+    Entering a transaction while another is open joins the outer one.
+
+    If commit_every is set, the transaction is committed and a new one
+    begun whenever that many rows have been written since the last commit.
+    A statement counts as one row, except an UNWIND batch run from an
+    UnwindRows query (as create_many and friends do), which counts as one
+    row per item. A failure then only rolls back the rows written since
+    the last commit.
+    """
+    def __init__(self, graph, commit_every=None):
+        self.__graph = graph
+        self.__session = self.__tx = self.__outer = None
+        self.commit_every = commit_every
+        self.pending = self.commits = 0
+
+    def __enter__(self):
+        self.__outer = self.__graph.current_transaction
+        if self.__outer is not None:
+            return self.__outer
+
+        pool = self.__graph.pool
+        self.__session = pool.acquire()
+        try:
+            self.__tx = self.__session.begin_transaction()
+        except:
+            pool.release(self.__session, discard=True)
+            raise
+        self.__graph.current_transaction = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.__outer is not None:
+            return
+        failed = exc_type is not None
+        try:
+            if failed:
+                self.rollback()
+            else:
+                self.commit()
+        except:
+            failed = True
+            raise
+        finally:
+            self.__graph.current_transaction = None
+            self.__graph.pool.release(self.__session, discard=failed)
+
+    def run(self, query, params=None, rows=1):
+        """Run a query which writes the given number of rows"""
+        result = self.__tx.run(query, params or {})
+        self.pending += rows
+        if self.commit_every and self.pending >= self.commit_every:
+            self.commit()
+            self.__tx = self.__session.begin_transaction()
+        return result
+
+    def commit(self):
+        if not self.__tx.closed:
+            self.__tx.commit()
+            self.__sync()
+            self.commits += 1
+            self.pending = 0
+
+    def rollback(self):
+        if not self.__tx.closed:
+            self.__tx.rollback()
+            self.__sync()
+            self.pending = 0
+
+    def __sync(self):
+        # wait for the server to acknowledge COMMIT/ROLLBACK so that any
+        # failure surfaces here rather than on some later statement
+        result = self.__session.last_result
+        if result is not None:
+            result.consume()
 
 
 class Query(object):
@@ -77,8 +724,8 @@ class Query(object):
         self.__log = QueryLog()
 
     def __call__(self, q, **params):
-        """Syntactic sugar for query.run(str(q), **params)"""
-        return self.run(str(q), **params)
+        """Syntactic sugar for query.run(q, **params)"""
+        return self.run(q, **params)
 
     @property
     def log(self):
@@ -89,10 +736,135 @@ class Query(object):
         return self.run('MATCH (all) RETURN all')
 
     def run(self, query, **params):
-        """Run an arbitrary Cypher query"""
-        with self.__graph.session() as session:
-            self.log(query, params)
-            return session.run(query, parameters=params)
+        """
+        Run an arbitrary Cypher query, given as a string or a CypherQuery.
+        An UnwindRows query counts as one row per item towards a
+        transaction's commit_every.
+        """
+        rows = getattr(query, 'row_count', 1)
+        query = str(query)
+        entry = self.log(query, params)
+        try:
+            transaction = self.__graph.current_transaction
+            if transaction is not None:
+                result = transaction.run(query, params, rows=rows)
+            else:
+                with self.__graph.pool.session() as session:
+                    result = session.run(query, parameters=params)
+        finally:
+            entry.finish()
+        return LoggedResult(result, entry)
+
+    def explain(self, q, **params):
+        """
+        Get the QueryPlan Neo4J would use for a CypherQuery (or Cypher
+        string) without running it.
+        """
+        return self.__plan('EXPLAIN', q, params)
+
+    def profile(self, q, **params):
+        """
+        Run a CypherQuery (or Cypher string) and get the QueryPlan it ran
+        with, including the rows and db hits of every step. Beware that
+        the query really runs, so any writes it makes are kept.
+        """
+        return self.__plan('PROFILE', q, params)
+
+    def __plan(self, keyword, q, params):
+        query, all_params = self.__query_and_params(q)
+        all_params.update(params)
+        summary = self.run('%s %s' % (keyword, query), **all_params).consume()
+        plan = summary.profile if keyword == 'PROFILE' else summary.plan
+        if plan is None:
+            raise RuntimeError('No plan was returned for the query.')
+        return QueryPlan(query, all_params, plan)
+
+    def run_many(self, queries, max_workers=None, ordered=True):
+        """
+        Run independent queries concurrently, each on its own pooled
+        session. Each query is a CypherQuery, a Cypher string, or a
+        (query, params) tuple.
+
+        If ordered, returns a list of results in input order. Otherwise,
+        returns an iterator of (index, result) pairs as queries complete.
+        Queries run outside any transaction open in the calling thread.
+        """
+        queries = [self.__query_and_params(q) for q in queries]
+        if not queries:
+            return [] if ordered else iter(())
+
+        workers = min(max_workers or self.__graph.pool.size, len(queries))
+        pool = ThreadPool(workers)
+
+        def run(item):
+            index, (query, params) = item
+            return index, self.run(query, **params)
+
+        if ordered:
+            try:
+                return [result for _, result in
+                        pool.map(run, enumerate(queries))]
+            finally:
+                pool.close()
+                pool.join()
+
+        def as_completed():
+            try:
+                for item in pool.imap_unordered(run, enumerate(queries)):
+                    yield item
+            finally:
+                pool.close()
+                pool.join()
+
+        return as_completed()
+
+    @staticmethod
+    def __query_and_params(query):
+        if isinstance(query, tuple):
+            query, params = query
+        else:
+            params = getattr(query, 'params', {})
+        return str(query), dict(params)
+
+    def run_async(self, query, **params):
+        """
+        Run an arbitrary Cypher query on the graph's async thread pool.
+        Returns an awaitable StatementResult.
+        """
+        return self.__graph.aio.run(self.run, str(query), **params)
+
+    def stream(self, query, **params):
+        """
+        Run an arbitrary Cypher query, returning a Rehydrator which keeps
+        its session checked out of the pool and pulls records lazily as it
+        is iterated. The session is returned to the pool when the records
+        run out, or discarded if the Rehydrator is closed before that.
+        """
+        transaction = self.__graph.current_transaction
+        if transaction is not None:
+            entry = self.log(query, params)
+            try:
+                result = transaction.run(query, params)
+            except:
+                entry.finish()
+                raise
+            return Rehydrator(result, self.__graph, log_entry=entry)
+
+        pool = self.__graph.pool
+        session = pool.acquire()
+        entry = self.log(query, params)
+        try:
+            result = session.run(query, parameters=params)
+        except:
+            pool.release(session, discard=True)
+            entry.finish()
+            raise
+
+        def release(exhausted):
+            pool.release(session, discard=not exhausted)
+
+        return Rehydrator(result, self.__graph, on_close=release,
+                          log_entry=entry)
 
 
 class Reflect(object):
@@ -125,10 +897,17 @@ class Schema(object):
         self.__schema = set()
         self.__hierarchy = dict()
         self.__relations = dict()
+        self.__label_index = dict()
+        self.__resolved = dict()
+        self.__nodes = dict()
+        self.__deferred = 0
 
     def create(self, obj):
         """
         Create the object's schema, if not already present.
+
+        Inside a deferred() block the object is only registered, and its
+        schema is written by the sync() at the end of the block.
         """
         node = obj.__node__
         if not node.type or node.type in self.__schema:
@@ -145,10 +924,13 @@ class Schema(object):
             return type_
 
         self.__schema.add(node.type)
+        self.__nodes[node.type] = node
         if obj.__node__ is not obj:
             self.__hierarchy[node.labels] = obj
             if node.type:
                 self.__hierarchy[node.type] = obj
+            self.__label_index[frozenset(node.labels)] = obj
+            self.__resolved.clear()
 
             # add backrefs to deferred types
             deferred_types = list(self.__relations.keys())
@@ -166,10 +948,47 @@ class Schema(object):
                     if type_ is not None:
                         rel.create_backref(type_)
 
-        schema = self.indexes() + self.constraints()
-        for index_or_constraint in node.schema:
-            if index_or_constraint not in schema:
-                self.__graph.query('CREATE ' + index_or_constraint)
+        if not self.__deferred:
+            schema = self.indexes() + self.constraints()
+            self.__apply('CREATE', [stmt for stmt in node.schema
+                                    if stmt not in schema])
+
+    @contextmanager
+    def deferred(self, wait=False, timeout=300):
+        """
+        Register classes defined inside a with block without touching the
+        graph, then sync() all of their schema at once on the way out.
+        """
+        self.__deferred += 1
+        try:
+            yield self
+        finally:
+            self.__deferred -= 1
+        if not self.__deferred:
+            self.sync(wait=wait, timeout=timeout)
+
+    def sync(self, wait=False, timeout=300):
+        """
+        Bring the graph's indexes and constraints up to date with every
+        registered class in one pass: reflect the current schema once,
+        then create whatever is missing in a single transaction. If wait
+        is set, block until indexes are online (up to timeout seconds).
+        Returns the statements that were applied.
+        """
+        self.__constraints = tuple(self.__reflect.constraints())
+        self.__indexes = tuple(self.__reflect.indexes())
+        schema = set(self.__indexes + self.__constraints)
+        missing = []
+        for node in self.__nodes.values():
+            for stmt in node.schema:
+                if stmt not in schema:
+                    schema.add(stmt)
+                    missing.append(stmt)
+        self.__apply('CREATE', missing)
+        if wait and missing:
+            self.__graph.query('CALL db.awaitIndexes({timeout})',
+                               timeout=int(timeout))
+        return missing
 
     def drop(self, obj):
         """
@@ -178,22 +997,66 @@ class Schema(object):
         node = obj.__node__
         if node.type in self.__schema:
             self.__schema.remove(node.type)
+            self.__nodes.pop(node.type, None)
 
         schema = self.indexes() + self.constraints()
-        for index_or_constraint in node.schema:
-            if index_or_constraint in schema:
-                self.__graph.query('DROP ' + index_or_constraint)
+        self.__apply('DROP', [stmt for stmt in node.schema if stmt in schema])
+
+    def __apply(self, keyword, statements):
+        """Run CREATE/DROP statements in one transaction, then update
+        the cached indexes and constraints to match."""
+        if not statements:
+            return
+        with self.__graph.transaction():
+            for stmt in statements:
+                self.__graph.query('%s %s' % (keyword, stmt))
+
+        indexes = [s for s in statements if s.startswith('INDEX')]
+        constraints = [s for s in statements if not s.startswith('INDEX')]
+        if keyword == 'CREATE':
+            self.__indexes = self.indexes() + tuple(indexes)
+            self.__constraints = self.constraints() + tuple(constraints)
+        else:
+            self.__indexes = tuple(s for s in self.indexes()
+                                   if s not in indexes)
+            self.__constraints = tuple(s for s in self.constraints()
+                                       if s not in constraints)
 
     def drop_all(self):
         for constraint in self.constraints():
             self.__graph.query('DROP ' + constraint)
         for index in self.__reflect.indexes():
             self.__graph.query('DROP ' + index)
+        self.__constraints = ()
+        self.__indexes = ()
 
     @property
     def classes(self):
         return self.__hierarchy.items()
 
+    def resolve(self, labels):
+        """
+        Find the OGM class for a node with the given labels, regardless of
+        their order. If no class has exactly those labels, the most specific
+        class whose labels are all present is used. Returns None if there is
+        no such class.
+        """
+        labels = frozenset(labels)
+        try:
+            return self.__resolved[labels]
+        except KeyError:
+            pass
+
+        cls = self.__label_index.get(labels)
+        if cls is None:
+            candidates = [(len(key), cls)
+                          for key, cls in self.__label_index.items()
+                          if key <= labels]
+            if candidates:
+                cls = max(candidates, key=lambda c: c[0])[1]
+        self.__resolved[labels] = cls
+        return cls
+
     def constraints(self):
         """
         Get current graph constraints lazily.
@@ -245,10 +1108,60 @@ class Graph(GraphDatabase):
     A thin wrapper around the Neo4J Bolt driver's GraphDatabase class
     providing a convenient auto-connection during initialization.
     """
-    def __init__(self, url=None, **kw):
+    def __init__(self, url=None, pool_size=10, pool_idle_timeout=300,
+                 pool_warm_up=0, pool_acquire_timeout=30, **kw):
         self.connect(url, **kw)
+        self.__pool = SessionPool(self, size=pool_size,
+                                  idle_timeout=pool_idle_timeout,
+                                  warm_up=pool_warm_up,
+                                  acquire_timeout=pool_acquire_timeout)
         self.__query = Query(self)
         self.__schema = Schema(self)
+        self.__local = threading.local()
+        self.__aio = None
+        self.__aio_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        return self.__pool
+
+    @property
+    def aio(self):
+        """
+        The AsyncBridge used by the asyncio API (Python 3.5+), created on
+        first use with one worker thread per pooled session, plus as many
+        again for reading open streams.
+        """
+        with self.__aio_lock:
+            if self.__aio is None:
+                from .aio import AsyncBridge
+                self.__aio = AsyncBridge(max_workers=self.pool.size)
+            return self.__aio
+
+    @property
+    def current_transaction(self):
+        """The Transaction open in the current thread, if any"""
+        return getattr(self.__local, 'transaction', None)
+
+    @current_transaction.setter
+    def current_transaction(self, transaction):
+        self.__local.transaction = transaction
+
+    @property
+    def identity_map(self):
+        """The identity map of the OGMSession open in this thread, if any"""
+        return getattr(self.__local, 'identity_map', None)
+
+    @identity_map.setter
+    def identity_map(self, identity_map):
+        self.__local.identity_map = identity_map
+
+    def transaction(self, commit_every=None):
+        """
+        Run queries issued inside a with block in one transaction,
+        optionally committing every commit_every rows.
+        """
+        return Transaction(self, commit_every=commit_every)
 
     @property
     def query(self):
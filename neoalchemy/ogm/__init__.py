@@ -1,2 +1,3 @@
 from .base import OGMBase
 from .relations import OneToManyRelation, ManyToManyRelation
+from .session import OGMSession
@@ -1,14 +1,39 @@
+from collections import OrderedDict
+from itertools import islice
+
 import six
 
-from ..cypher import Create, Match, Merge, Count
+from ..cypher import Create, Match, Merge, Count, QueryCache, UnwindRows
+from ..cypher.operations import ComparisonExpression
 from ..exceptions import (DetachedObjectError, ImmutableAttributeError,
-                          UnboundedWriteOperation)
+                          PartialObjectError, UnboundedWriteOperation)
 from ..graph import Rehydrator
 from ..primitives import Node, Relationship
-from .relations import Relation
+from .query import MatchQuery
+from .relations import Relation, relation_key
 from ..shared.objects import Property
 
 
+def batches(iterable, batch_size):
+    """Split an iterable into lists of at most batch_size items"""
+    batch_size = int(batch_size)
+    if batch_size < 1:
+        raise ValueError('batch_size must be a positive integer.')
+    iterator = iter(iterable)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def group_by_class(objects):
+    """Group OGM instances by class, preserving order"""
+    groups = OrderedDict()
+    for obj in objects:
+        groups.setdefault(obj.__class__, []).append(obj)
+    return list(groups.items())
+
+
 class OGMDescriptor(object):
     def __init__(self, name):
         self.name = name
@@ -21,13 +46,42 @@ class PropertyDescriptor(OGMDescriptor):
     def __get__(self, instance, owner):
         if instance is None:
             return owner.__node__[self.name]
-        return instance.__node__[self.name].value
+        try:
+            return instance.__values__[self.name]
+        except KeyError:
+            raise AttributeError("Property '%s' of partially loaded %s "
+                                 "object was not loaded." %
+                                 (self.name, owner.__name__))
 
     def __set__(self, instance, value):
-        prop = instance.__node__[self.name]
-        if prop.value != value:
-            instance.__changed__[self.name] = (prop.value, value)
-        prop.value = value
+        value = instance.__class__.__node__[self.name].coerce(value)
+        old_value = instance.__values__.get(self.name)
+        if old_value != value:
+            instance.__changed__[self.name] = (old_value, value)
+        instance.__values__[self.name] = value
+        node = instance.__dict__.get('__node__')
+        if node is not None:
+            node[self.name].load(value)
+
+
+class NodeDescriptor(object):
+    """
+    On the class, its Node. On an instance, a copy of that Node holding
+    the instance's values, made the first time it is needed (e.g. to
+    build a query) and kept in sync afterwards. Until then, instances
+    share the class's Property objects and keep only a dict of values.
+    """
+    def __init__(self, node):
+        self.node = node
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.node
+        node = instance.__dict__['__node__'] = self.node.copy()
+        for key, value in instance.__values__.items():
+            # already coerced, or loaded from the graph as is
+            node[key].load(value)
+        return node
 
 
 class RelationDescriptor(OGMDescriptor):
@@ -64,7 +118,7 @@ class OGMMeta(type):
             setattr(cls, prop_name, PropertyDescriptor(prop_name))
 
         cls.__relations__ = RelationDescriptor(tuple(relations))
-        cls.__node__ = Node(*labels, **properties)
+        cls.__node__ = NodeDescriptor(Node(*labels, **properties))
 
         try:
             graph = cls.graph
@@ -77,38 +131,126 @@ class OGMMeta(type):
 
 @six.add_metaclass(OGMMeta)
 class OGMBase(object):
+    BATCH_SIZE = 1000
+    TRUSTED_HYDRATION = True
+    query_cache = QueryCache()
+
     def __init__(self, **properties):
         self.__changed__ = {}
-        self.__node__ = self.__node__.copy()
-        for prop_name, value in properties.items():
-            try:
-                self.__node__[prop_name].value = value
-            except KeyError:
-                raise ValueError("Unrecognized argument: '%s'" % prop_name)
+        self.__related__ = {}
+        self.__values__ = values = {}
+        for prop_name, prop in self.__class__.__node__.items():
+            values[prop_name] = prop.coerce(properties.pop(prop_name, None))
+        for prop_name in properties:
+            raise ValueError("Unrecognized argument: '%s'" % prop_name)
+        self.__init_relations()
+
+    def __init_relations(self):
         for rel_name in self.__relations__:
             rel = getattr(self.__class__, rel_name)
             setattr(self, rel_name, rel.copy(obj=self))
 
+    @classmethod
+    def hydrate(self, properties, partial=False):
+        """
+        Build an instance from properties loaded from the graph. Unless
+        TRUSTED_HYDRATION is turned off for the class, the stored values
+        are assumed to be valid already and are assigned as they are,
+        without running types, validators or defaults. Properties the
+        class doesn't define are ignored.
+
+        If partial is set, only the given properties count as loaded:
+        reading any other raises AttributeError, and the object can't be
+        written until every property has been loaded or assigned.
+        """
+        if not (self.TRUSTED_HYDRATION or partial):
+            return self(**properties)
+
+        obj = self.__new__(self)
+        obj.__changed__ = {}
+        obj.__related__ = {}
+        node = self.__node__
+        if not partial:
+            values = {key: properties.get(key) for key in node.keys()}
+        elif self.TRUSTED_HYDRATION:
+            values = {key: properties[key] for key in node.keys()
+                      if key in properties}
+        else:
+            values = {key: node[key].coerce(properties[key])
+                      for key in node.keys() if key in properties}
+        obj.__values__ = values
+        obj.__init_relations()
+        return obj
+
+    @property
+    def is_partial(self):
+        """Whether some properties of this object were never loaded"""
+        return len(self.__values__) < len(self.__class__.__node__.keys())
+
+    def __check_loaded(self, action, keys=None):
+        """Raise unless the given keys, or all properties, were loaded"""
+        if self.is_partial:
+            if keys is None:
+                keys = self.__class__.__node__.keys()
+            missing = set(keys).difference(self.__values__)
+            if missing:
+                raise PartialObjectError(self, missing, action=action)
+
     def bind(self, *keys):
         self.__node__.bind(*keys)
         return self
 
     @property
     def bound_keys(self):
-        return self.__node__.bound_keys
+        node = self.__dict__.get('__node__', self.__class__.__node__)
+        return node.bound_keys
 
     @property
     def is_bound(self):
-        return self.__node__.is_bound
+        node = self.__dict__.get('__node__', self.__class__.__node__)
+        return node.is_bound
 
     def create(self):
         if self.graph is None:
             raise DetachedObjectError(self, action='create')
+        self.__check_loaded('create')
 
-        create = Create(self.__node__)
-        self.graph.query(create, **create.params)
+        query, params = self.query_cache.template(
+            (self.__class__, 'CREATE'),
+            lambda: Create(self.__node__), node=self.__node__)
+        self.graph.query(query, **params)
         return self
 
+    def create_async(self):
+        """Awaitable create(), run on the graph's async thread pool"""
+        return self.graph.aio.run(self.create)
+
+    @classmethod
+    def create_many(self, objects, batch_size=None):
+        """
+        Create many nodes using one UNWIND statement per batch.
+        """
+        if self.graph is None:
+            raise DetachedObjectError(self, action='create')
+
+        if batch_size is None:
+            batch_size = self.BATCH_SIZE
+        objects = list(objects)
+        groups = group_by_class(objects)
+        for cls, _ in groups:
+            if not issubclass(cls, self):
+                raise ValueError("Can't create %s object with %s.create_many()"
+                                 % (cls.__name__, self.__name__))
+        for obj in objects:
+            obj.__check_loaded('create')
+
+        for cls, group in groups:
+            for batch in batches(group, batch_size):
+                unwind = UnwindRows(dict(obj.__values__) for obj in batch)
+                create = unwind & Create(cls.__node__, row=unwind.row)
+                self.graph.query(create, **create.params)
+        return objects
+
     def delete(self, detach=True, force=False):
         if self.graph is None:
             raise DetachedObjectError(self, action='delete')
@@ -117,41 +259,138 @@ class OGMBase(object):
             if not self.bound_keys and not force:
                 extra_info = 'To override, use delete_all() or force=True.'
                 raise UnboundedWriteOperation(self, extra_info)
+        self.__check_loaded('delete', self.bound_keys)
 
-        match = Match(self.__node__).delete(self.__node__, detach=detach)
-        self.graph.query(match, **match.params)
+        query, params = self.query_cache.template(
+            (self.__class__, 'DELETE', self.bound_keys, bool(detach)),
+            lambda: Match(self.__node__).delete(self.__node__, detach=detach),
+            node=self.__node__)
+        self.graph.query(query, **params)
+
+    def delete_async(self, detach=True, force=False):
+        """Awaitable delete(), run on the graph's async thread pool"""
+        return self.graph.aio.run(self.delete, detach=detach, force=force)
 
     def delete_all(self):
         self.bind(None)
         self.delete(detach=True, force=True)
 
+    @classmethod
+    def count(self, **properties):
+        """Count nodes of this class with the given property values"""
+        return MatchQuery(self, **properties).count()
+
+    @classmethod
+    def exists(self, **properties):
+        """Whether any node of this class has the given property values"""
+        return MatchQuery(self, **properties).exists()
+
     @classmethod
     def match(self, **properties):
+        """
+        Match nodes of this class by property. The query runs lazily, when
+        the results are first iterated; see MatchQuery for its options.
+        """
+        return MatchQuery(self, **properties)
+
+    @classmethod
+    def match_many(self, filters, max_workers=None):
+        """
+        Run one match() per dict of properties in filters concurrently,
+        returning a list of Rehydrators in the same order.
+        """
         if self.graph is None:
             raise DetachedObjectError(self, action='match')
 
-        matched = self.__node__.copy(**properties)
-        match = Match(matched).return_(matched)
-        return Rehydrator(self.graph.query(match, **match.params),
-                          self.graph)
+        queries = [MatchQuery(self, **properties).compile()
+                   for properties in filters]
+        return [Rehydrator(result, self.graph) for result in
+                self.graph.query.run_many(queries, max_workers=max_workers)]
+
+    @classmethod
+    def match_async(self, **properties):
+        """
+        Awaitable match(), run on the graph's async thread pool. The
+        resulting Rehydrator supports ``async for``.
+        """
+        return self.graph.aio.run(self.match(**properties).stream)
 
     def merge(self, singleton=False):
         if self.graph is None:
             raise DetachedObjectError(self, action='merge')
+        self.__bind_for_merge(singleton)
+
+        def build():
+            node = self.__node__
+            merge = Merge(node).on_create().set(*node.values())
+            if self.__changed__:
+                merge.on_match().set(*(node[key] for key in self.__changed__))
+            return merge.return_(node)
+
+        changed = tuple(sorted(self.__changed__))
+        query, params = self.query_cache.template(
+            (self.__class__, 'MERGE', self.bound_keys, changed),
+            build, node=self.__node__)
+        return Rehydrator(self.graph.query(query, **params), self.graph).one
+
+    def merge_async(self, singleton=False):
+        """Awaitable merge(), run on the graph's async thread pool"""
+        return self.graph.aio.run(self.merge, singleton=singleton)
+
+    @classmethod
+    def merge_many(self, objects, batch_size=None, hydrate=False,
+                   singleton=False):
+        """
+        Merge many nodes using one UNWIND statement per batch.
+
+        Objects are batched by class, bound keys and changed properties,
+        since each of those determines the shape of the MERGE statement.
+        Pass hydrate=True to get the merged objects back from the graph.
+        """
+        if self.graph is None:
+            raise DetachedObjectError(self, action='merge')
+
+        if batch_size is None:
+            batch_size = self.BATCH_SIZE
+        objects = list(objects)
+        groups = OrderedDict()
+        for obj in objects:
+            if not isinstance(obj, self):
+                raise ValueError("Can't merge %s object with %s.merge_many()"
+                                 % (obj.__class__.__name__, self.__name__))
+            obj.__bind_for_merge(singleton)
+            key = (obj.__class__, obj.bound_keys,
+                   tuple(sorted(obj.__changed__)))
+            groups.setdefault(key, []).append(obj)
+
+        merged = []
+        for (cls, bound_keys, changed), group in groups.items():
+            node = cls.__node__.copy().bind(*(bound_keys or (None,)))
+            for batch in batches(group, batch_size):
+                unwind = UnwindRows(dict(obj.__values__) for obj in batch)
+                row = unwind.row
+                merge = (Merge(node, row=row).on_create()
+                         .set(ComparisonExpression(node, row, '=')))
+                if changed:
+                    merge.on_match().set(*(node[key] == row[key]
+                                           for key in changed))
+                if hydrate:
+                    merge.return_(node)
+                merge = unwind & merge
+                result = self.graph.query(merge, **merge.params)
+                if hydrate:
+                    merged.extend(record[0] for record in
+                                  Rehydrator(result, self.graph))
+        return merged if hydrate else objects
+
+    def __bind_for_merge(self, singleton):
+        self.__check_loaded('merge')
         if not self.is_bound:
             self.bind()
             if not self.bound_keys and not singleton:
                 extra_info = 'To merge a singleton pass singleton=True.'
                 raise UnboundedWriteOperation(self, extra_info)
 
-        merge = Merge(self.__node__).on_create().set(*self.__node__.values())
-        if self.__changed__:
-            (merge.on_match()
-                  .set(*(self.__node__[key] for key in self.__changed__)))
-        merge.return_(self.__node__)
-        return Rehydrator(self.graph.query(merge, **merge.params),
-                          self.graph).one
-
     def init_relation(self, rel_type, related, **kw):
         unbound = kw.pop('unbound', False)
         unbound_start, unbound_end = (unbound or kw.pop(k, False)
@@ -171,26 +410,50 @@ class OGMBase(object):
                 raise UnboundedWriteOperation(rel.end_node, extra_info)
         return rel
 
+    def __relation_keys(self, end, unbound):
+        """The keys init_relation() would bind this object's node to"""
+        if self.is_bound:
+            return self.bound_keys
+        keys = tuple(key for key, prop in self.__class__.__node__.items()
+                     if prop.primary_key)
+        if not keys and not unbound:
+            extra_info = 'To override, use unbound_%s=True.' % end
+            raise UnboundedWriteOperation(self, extra_info)
+        return keys
+
+    def __check_relation_loaded(self, action, rel, related):
+        self.__check_loaded(action, rel.start_node.bound_keys)
+        related.__check_loaded(action, rel.end_node.bound_keys)
+
     def create_relation(self, rel_type, related, **kw):
         rel = self.init_relation(rel_type, related, **kw)
-        create = (
+        self.__check_relation_loaded('create a relation with', rel, related)
+        return self.__query_relation('CREATE', rel, related, lambda: (
             (Match(rel.start_node) &
              Match(rel.end_node) &
              Create(rel))
             .return_(Count(rel))
-        )
-        return self.graph.query(create, **create.params)
+        ))
+
+    @classmethod
+    def create_relations(self, rel_type, pairs, batch_size=None, **kw):
+        """
+        Create a relationship between each (start, end) pair, using one
+        UNWIND statement per batch. Returns the number created.
+        """
+        return self.__write_relations(Create, rel_type, pairs,
+                                      batch_size, **kw)
 
     def delete_relation(self, rel_type, related, **kw):
         rel = self.init_relation(rel_type, related, **kw)
-        match = (
+        self.__check_relation_loaded('delete a relation with', rel, related)
+        return self.__query_relation('DELETE', rel, related, lambda: (
             (Match(rel.start_node) &
              Match(rel.end_node) &
              Match(rel))
             .delete(rel)
             .return_(Count(rel))
-        )
-        return self.graph.query(match, **match.params)
+        ))
 
     def match_relations(self, rel_type, *labels, **properties):
         rev = properties.pop('rev', False)
@@ -207,15 +470,95 @@ class OGMBase(object):
             (Match(rel.start_node) & Match(rel.end_node) & Match(rel))
              .return_(ret)
         )
-        return Rehydrator(self.graph.query(match, **match.params),
-                          self.graph)
+        return self.graph.query.stream(str(match), **match.params)
 
     def merge_relation(self, rel_type, related, **kw):
         rel = self.init_relation(rel_type, related, **kw)
-        merge = (
+        self.__check_relation_loaded('merge a relation with', rel, related)
+        return self.__query_relation('MERGE', rel, related, lambda: (
             (Match(rel.start_node) &
              Match(rel.end_node) &
              Merge(rel))
             .return_(Count(rel))
-        )
-        return self.graph.query(merge, **merge.params)
+        ))
+
+    def __query_relation(self, verb, rel, related, build):
+        key = (self.__class__, verb + '_RELATION', rel.type,
+               rel.start_node.bound_keys, related.__class__,
+               rel.end_node.bound_keys, tuple(sorted(rel.keys())))
+        query, params = self.query_cache.template(
+            key, build, start=rel.start_node, end=rel.end_node, rel=rel)
+        try:
+            return self.graph.query(query, **params)
+        finally:
+            self.__expire_relation(rel.type, related)
+
+    def __expire_relation(self, rel_type, related):
+        self.__related__.pop((rel_type, False), None)
+        related.__related__.pop((rel_type, True), None)
+
+    def refresh_relations(self, *names):
+        """
+        Forget remembered values of the named relations and backrefs, or
+        of all of them if no names are given, so they are read again.
+        """
+        if not names:
+            self.__related__.clear()
+        for name in names:
+            self.__related__.pop(relation_key(self.__class__, name), None)
+        return self
+
+    @classmethod
+    def merge_relations(self, rel_type, pairs, batch_size=None, **kw):
+        """
+        Merge a relationship between each (start, end) pair, using one
+        UNWIND statement per batch. Returns the number merged.
+        """
+        return self.__write_relations(Merge, rel_type, pairs,
+                                      batch_size, **kw)
+
+    @classmethod
+    def __write_relations(self, verb, rel_type, pairs, batch_size, **kw):
+        if self.graph is None:
+            raise DetachedObjectError(self, action='write')
+
+        if batch_size is None:
+            batch_size = self.BATCH_SIZE
+        unbound = kw.pop('unbound', False)
+        unbound_start = unbound or kw.pop('unbound_start', False)
+        unbound_end = unbound or kw.pop('unbound_end', False)
+        action = '%s a relation with' % verb.__name__.lower()
+        groups = OrderedDict()
+        for start, end in pairs:
+            # rows are read straight from the instances' values, so no
+            # Node needs to be built for either end of each pair
+            start_keys = start.__relation_keys('start', unbound_start)
+            end_keys = end.__relation_keys('end', unbound_end)
+            start.__check_loaded(action, start_keys)
+            end.__check_loaded(action, end_keys)
+            start.__expire_relation(rel_type, end)
+            row = {'start': {k: start.__values__[k] for k in start_keys},
+                   'end': {k: end.__values__[k] for k in end_keys}}
+            key = (start.__class__, start_keys, end.__class__, end_keys)
+            groups.setdefault(key, []).append(row)
+
+        count = 0
+        for (start_cls, start_keys, end_cls, end_keys), rows in \
+                groups.items():
+            rel = Relationship(rel_type, **kw)
+            rel.start_node = start_cls.__node__.copy(var='self')
+            rel.start_node.bind(*(start_keys or (None,)))
+            rel.end_node = end_cls.__node__.copy(var='related')
+            rel.end_node.bind(*(end_keys or (None,)))
+            for batch in batches(rows, batch_size):
+                unwind = UnwindRows(batch)
+                query = (
+                    (unwind &
+                     Match(rel.start_node, row=unwind.row['start']) &
+                     Match(rel.end_node, row=unwind.row['end']) &
+                     verb(rel))
+                    .return_(Count(rel))
+                )
+                for record in self.graph.query(query, **query.params):
+                    count += record[0]
+        return count
@@ -0,0 +1,222 @@
+from ..cypher import Collect, Count, Match
+from ..cypher.operations import CypherVariable
+from ..exceptions import DetachedObjectError
+from ..primitives import Node, Relationship
+from .relations import relation_key
+
+
+class MatchQuery(object):
+    """
+    A lazy OGM match. Nothing is sent to the graph until the results are
+    first needed, so options such as prefetch() can be chained on first.
+    Iterating it yields the same records as a Rehydrator.
+    """
+    def __init__(self, cls, **properties):
+        if cls.graph is None:
+            raise DetachedObjectError(cls, action='match')
+        self.__cls = cls
+        self.__properties = properties
+        self.__prefetch = ()
+        self.__only = ()
+        self.__results = None
+
+    def prefetch(self, *names):
+        """
+        Load the named relations of every matched object in the same
+        query, so that reading them afterwards needs no more queries.
+        Names may be relations defined on the class or the backrefs of
+        one-to-many relations to it; many-to-many backrefs can't be
+        prefetched.
+        """
+        for name in names:
+            relation_key(self.__cls, name)
+        self.__prefetch += names
+        return self
+
+    def only(self, *properties):
+        """
+        Load just the given properties (e.g. Class.name, or 'name') of
+        each match. The results are partially loaded objects: reading any
+        other property raises AttributeError, and they refuse to be
+        created or merged until the rest are set.
+        """
+        cls = self.__cls
+        for prop in properties:
+            name = getattr(prop, 'name', prop)
+            if name not in cls.__node__.keys():
+                raise ValueError("'%s' is not a property of %s" %
+                                 (name, cls.__name__))
+            if name not in self.__only:
+                self.__only += (name,)
+        return self
+
+    def compile(self):
+        """Get the query and its parameters"""
+        cls = self.__cls
+        matched = self.__matched()
+        return cls.query_cache.template(
+            (cls, 'MATCH', matched.bound_keys, self.__prefetch, self.__only),
+            lambda: self.__build(matched), node=matched)
+
+    def stream(self):
+        """Run the query, returning a Rehydrator over its results"""
+        query, params = self.compile()
+        return self.__stream(query, params)
+
+    def explain(self):
+        """Get the QueryPlan Neo4J would use for this match"""
+        query, params = self.compile()
+        return self.__cls.graph.query.explain(query, **params)
+
+    def profile(self):
+        """
+        Run this match and get the QueryPlan it ran with, including the
+        rows and db hits of every step. The results are not hydrated.
+        """
+        query, params = self.compile()
+        return self.__cls.graph.query.profile(query, **params)
+
+    def count(self):
+        """
+        Count the matches without loading them. With no filters, only the
+        class's own label is matched, so the graph can answer from its
+        label counts.
+        """
+        cls = self.__cls
+        if self.__properties:
+            matched = self.__matched()
+        else:
+            matched = Node(cls.__node__.type)
+        query, params = cls.query_cache.template(
+            (cls, 'COUNT', matched.bound_keys),
+            lambda: Match(matched).return_(Count(matched)), node=matched)
+        return self.__scalar(query, params)
+
+    def exists(self):
+        """Whether anything matches, without loading it"""
+        cls = self.__cls
+        matched = self.__matched()
+        query, params = cls.query_cache.template(
+            (cls, 'EXISTS', matched.bound_keys),
+            lambda: (Match(matched).with_(matched).limit(1)
+                     .return_(Count(matched))),
+            node=matched)
+        return bool(self.__scalar(query, params))
+
+    def paginate(self, by, page_size=None):
+        """
+        Walk every match in order of the property by (e.g. Class.id, or
+        just 'id'), yielding lists of up to page_size objects. Each page
+        picks up after the last value of the one before, rather than
+        skipping over it, so deep pages are as cheap as the first and an
+        index on by can be used. by should be unique and always set.
+        """
+        cls = self.__cls
+        name = getattr(by, 'name', by)
+        if name not in cls.__node__.keys():
+            raise ValueError("'%s' is not a property of %s" %
+                             (name, cls.__name__))
+        if page_size is None:
+            page_size = cls.BATCH_SIZE
+        page_size = int(page_size)
+        if page_size < 1:
+            raise ValueError('page_size must be a positive integer.')
+
+        if self.__only:
+            self.only(name)
+        matched = self.__matched()
+        first = self.__build(matched, order_by=name, limit=page_size)
+        query, params = str(first), dict(first.params)
+        last_key = 'last_%s' % name
+        after = self.__build(matched, order_by=name, limit=page_size,
+                             after=last_key)
+        while True:
+            page = [record[0] for record in self.__stream(query, params)]
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            query, params = str(after), dict(after.params)
+            params[last_key] = getattr(page[-1], name)
+
+    def close(self):
+        if self.__results is not None:
+            self.__results.close()
+
+    @property
+    def one(self):
+        return self.__rehydrator().one
+
+    def __matched(self):
+        matched = self.__cls.__node__.copy(**self.__properties)
+        if self.__properties:
+            matched.bind(*self.__properties)
+        return matched
+
+    def __build(self, matched, order_by=None, limit=None, after=None):
+        query = Match(matched)
+        if after is not None:
+            # the parameter's value is filled in for each page
+            query.params[after] = None
+            query.where(matched[order_by] > CypherVariable('{%s}' % after))
+        if order_by is not None and self.__prefetch:
+            query.with_(matched).order_by(matched[order_by]).limit(limit)
+
+        columns = [matched]
+        for name in self.__prefetch:
+            rel_type, rev = relation_key(self.__cls, name)
+            related = Node(var=name)
+            start, end = (related, matched) if rev else (matched, related)
+            rel = Relationship(rel_type, start_node=start, end_node=end,
+                               var='%s_rel' % name)
+            query &= Match(rel, optional=True)
+            query.with_(*(columns + [Collect(related)]))
+            columns.append(CypherVariable('%s_collect' % name))
+        if self.__only:
+            columns[0] = CypherVariable('{%s} AS %s' % (', '.join(
+                '%s: %s' % (name, matched[name].var) for name in self.__only),
+                matched.var))
+        query.return_(*columns)
+
+        if order_by is not None:
+            query.order_by(matched[order_by])
+            if not self.__prefetch:
+                query.limit(limit)
+        return query
+
+    def __scalar(self, query, params):
+        for record in self.__cls.graph.query(query, **params):
+            return record[0]
+        return 0
+
+    def __stream(self, query, params):
+        results = self.__cls.graph.query.stream(query, **params)
+        if self.__only:
+            results.partial(self.__cls)
+        return results.prefetched(*(relation_key(self.__cls, name)
+                                    for name in self.__prefetch))
+
+    def __rehydrator(self):
+        if self.__results is None:
+            self.__results = self.stream()
+        return self.__results
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.__rehydrator())
+
+    def next(self):
+        return self.__next__()
+
+    def __aiter__(self):
+        from ..aio import AsyncIterator
+        return AsyncIterator(None, self.__cls.graph.aio,
+                             start=self.__rehydrator)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
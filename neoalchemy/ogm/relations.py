@@ -1,6 +1,9 @@
+from neo4j.v1 import Record
 import six
 
 from ..exceptions import ImmutableAttributeError
+from ..graph import Rehydrator
+from ..primitives import Node
 from ..shared.objects import SetOnceDescriptor
 
 
@@ -11,9 +14,16 @@ class ManyToOneDescriptor(object):
 
     def __get__(self, instance, owner):
         if instance is None:
-            self.relation
+            return self.relation
 
-        return instance.match_relations(self.relation.type, rev=True).one
+        key = (self.relation.type, True)
+        try:
+            related = instance.__related__[key]
+        except KeyError:
+            related = [record[0] for record in
+                       instance.match_relations(self.relation.type, rev=True)]
+            instance.__related__[key] = related
+        return related[0] if related else None
 
     def __set__(self, instance, value):
         raise ImmutableAttributeError(self.name, instance)
@@ -22,6 +32,25 @@ class ManyToOneDescriptor(object):
         raise ImmutableAttributeError(self.name, instance)
 
 
+def relation_key(cls, name):
+    """
+    Get the (rel_type, rev) key under which a relation or backref of an
+    OGM class is remembered on its instances.
+    """
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            attr = vars(klass)[name]
+            break
+    else:
+        attr = None
+
+    if isinstance(attr, ManyToOneDescriptor):
+        return attr.relation.type, True
+    elif name in cls.__relations__:
+        return attr.type, False
+    raise ValueError("'%s' is not a relation of %s" % (name, cls.__name__))
+
+
 class RelationMeta(type):
     def __init__(cls, class_name, bases, attrs):
         cls.type = SetOnceDescriptor('type', type=str)
@@ -64,36 +93,96 @@ class Relation(object):
                               **dict(self.unbound_args))
 
     def create(self, related):
-        if self.restricted_types:
-            if not any(label in related.__node__.labels
-                       for label in self.restricted_types):
-                restricted_types = map(str, self.restricted_types)
-                raise ValueError("Related object is '%r' but must be one of: "
-                                 "'%s'" % (related,
-                                           ', '.join(restricted_types)))
+        self.__check_type(related)
         return self.obj.create_relation(self.type, related,
                                         **self.__unbound_args)
 
+    def create_many(self, related, batch_size=None):
+        """
+        Create this relation for many objects at once. Each item is either
+        a related object or, on an unattached relation, a (start, end) pair.
+        """
+        pairs = self.__pairs(related)
+        if not pairs:
+            return 0
+        return pairs[0][0].create_relations(self.type, pairs,
+                                            batch_size=batch_size,
+                                            **self.__unbound_args)
+
     def delete(self, related):
         return self.obj.delete_relation(self.type, related,
                                         **self.__unbound_args)
 
     def match(self, *labels, **properties):
-        return self.obj.match_relations(self.type, *labels, **properties)
+        """
+        Match related objects. Unfiltered results are remembered on the
+        object until a relation of this type is written or refresh() is
+        called.
+        """
+        if labels or properties:
+            return self.obj.match_relations(self.type, *labels, **properties)
+
+        key = (self.type, False)
+        try:
+            related = self.obj.__related__[key]
+        except KeyError:
+            related = [record[0] for record in
+                       self.obj.match_relations(self.type)]
+            self.obj.__related__[key] = related
+        return Rehydrator([Record(('node',), (obj,)) for obj in related],
+                          self.obj.graph)
+
+    def refresh(self):
+        """Forget remembered match() results"""
+        self.obj.__related__.pop((self.type, False), None)
+        return self
 
     def merge(self, related):
+        self.__check_type(related)
+        return self.obj.merge_relation(self.type, related,
+                                       **self.__unbound_args)
+
+    def merge_many(self, related, batch_size=None):
+        """
+        Merge this relation for many objects at once. Each item is either
+        a related object or, on an unattached relation, a (start, end) pair.
+        """
+        pairs = self.__pairs(related)
+        if not pairs:
+            return 0
+        return pairs[0][0].merge_relations(self.type, pairs,
+                                           batch_size=batch_size,
+                                           **self.__unbound_args)
+
+    def create_backref(self, cls):
+        raise NotImplementedError
+
+    def __check_type(self, related):
         if self.restricted_types:
-            if not any(label in related.__node__.labels
+            # an OGM class's labels, without building the instance's node
+            node = getattr(related.__class__, '__node__', None)
+            if not isinstance(node, Node):
+                node = related.__node__
+            if not any(label in node.labels
                        for label in self.restricted_types):
                 restricted_types = map(str, self.restricted_types)
                 raise ValueError("Related object is '%r' but must be one of: "
                                  "'%s'" % (related,
                                            ', '.join(restricted_types)))
-        return self.obj.merge_relation(self.type, related,
-                                       **self.__unbound_args)
 
-    def create_backref(self, cls):
-        raise NotImplementedError
+    def __pairs(self, related):
+        pairs = []
+        for item in related:
+            if isinstance(item, tuple):
+                start, end = item
+            elif self.obj is not None:
+                start, end = self.obj, item
+            else:
+                raise ValueError('Relation is not attached to an object; '
+                                 'pass (start, end) pairs instead.')
+            self.__check_type(end)
+            pairs.append((start, end))
+        return pairs
 
     @property
     def unbound_args(self):
@@ -0,0 +1,105 @@
+"""
+A unit of work for the OGM: an identity map of loaded objects plus the
+new and changed objects to be written back together at commit.
+"""
+from collections import OrderedDict
+
+from ..exceptions import DetachedObjectError
+from .base import group_by_class
+
+
+class OGMSession(object):
+    """
+    Within a with block, objects loaded from the graph are interned by
+    primary key so that each node maps to a single instance. Objects
+    passed to add() and loaded objects with changes are flushed in
+    batches, in one transaction, when the block exits (or on commit()).
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.__identity_map = {}
+        self.__new = OrderedDict()
+        self.__outer = None
+
+    def __enter__(self):
+        self.__outer = self.graph.identity_map
+        self.graph.identity_map = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.graph.identity_map = self.__outer
+
+    @staticmethod
+    def identity(obj):
+        """The identity map key for obj, or None if it has no identity"""
+        keys = tuple(key for key, prop in obj.__class__.__node__.items()
+                     if prop.primary_key)
+        values = tuple(getattr(obj, key) for key in keys)
+        if not keys or any(value is None for value in values):
+            return None
+        return (obj.__class__, values)
+
+    def intern(self, obj):
+        """Return the instance already mapped to obj's node, or map obj"""
+        key = self.identity(obj)
+        if key is None:
+            return obj
+        return self.__identity_map.setdefault(key, obj)
+
+    def get(self, cls, **primary_keys):
+        """Fetch an object by primary key, from the identity map if loaded"""
+        pk_names = set(key for key, prop in cls.__node__.items()
+                       if prop.primary_key)
+        if pk_names and set(primary_keys) == pk_names:
+            key = self.identity(cls(**primary_keys))
+            try:
+                return self.__identity_map[key]
+            except KeyError:
+                pass
+        return cls.match(**primary_keys).one
+
+    def add(self, *objects):
+        """Mark new objects to be created at the next flush"""
+        for obj in objects:
+            if obj.graph is not self.graph:
+                raise DetachedObjectError(obj, action='add')
+            self.__new[id(obj)] = obj
+
+    @property
+    def new(self):
+        return list(self.__new.values())
+
+    @property
+    def dirty(self):
+        return [obj for obj in self.__identity_map.values()
+                if obj.__changed__]
+
+    def flush(self):
+        """Write new and changed objects in batches, in one transaction"""
+        new, dirty = self.new, self.dirty
+        if not new and not dirty:
+            return
+        with self.graph.transaction():
+            for cls, group in group_by_class(new):
+                cls.create_many(group)
+            for cls, group in group_by_class(dirty):
+                cls.merge_many(group)
+        self.__new.clear()
+        for obj in new + dirty:
+            obj.__changed__ = {}
+        for obj in new:
+            self.intern(obj)
+
+    def commit(self):
+        self.flush()
+
+    def rollback(self):
+        """Forget pending new objects and the identity map"""
+        self.__new.clear()
+        self.__identity_map.clear()
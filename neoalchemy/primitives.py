@@ -39,13 +39,9 @@ class Node(GraphObject):
             except IndexError:
                 self.type = None
 
-    def copy(self, shallow=False, **properties):
+    def copy(self, **properties):
         var = properties.pop('var', self.var)
-        if shallow:
-            copy = Node(self, graph=self.graph, var=var)
-        else:
-            copy = Node(self, graph=self.graph, var=var,
-                        **{key: prop.copy() for key, prop in self.items()})
+        copy = Node(self, graph=self.graph, var=var)
         if self.is_bound:
             copy.bind(*self.bound_keys)
         for key, value in properties.items():
@@ -56,10 +52,13 @@ class Node(GraphObject):
     def __node__(self):
         return self
 
-    def pattern(self, inline_props=False):
+    def pattern(self, inline_props=False, row=None):
         labels = ':`%s`' % '`:`'.join(self.labels) if self.labels else ''
         if inline_props and self.bound_keys:
-            props = self.inline_properties
+            if row is None:
+                props = self.inline_properties
+            else:
+                props = self.inline_row_properties(row)
             return '(%s%s %s)' % (self.var, labels, props)
         else:
             return '(%s%s)' % (self.var, labels)
@@ -109,7 +108,7 @@ class Relationship(GraphObject):
     def exists(self, exists=True):
         return Exists(self, exists)
 
-    def pattern(self, inline_props=False):
+    def pattern(self, inline_props=False, row=None):
         if self.start_node is None or self.end_node is None:
             raise DetachedObjectError(self)
         if (self.start_node is not self.end_node and
@@ -121,7 +120,11 @@ class Relationship(GraphObject):
         base_pattern = '-[%s%s%s%%s]-%s' % (self.var, type_spec, self.depth,
                                             '>' if self.directed else '')
         if inline_props and self.bound_keys:
-            pattern = base_pattern % (' ' + self.inline_properties)
+            if row is None:
+                props = self.inline_properties
+            else:
+                props = self.inline_row_properties(row)
+            pattern = base_pattern % (' ' + props)
         else:
             pattern = base_pattern % ''
 
@@ -1,5 +1,3 @@
-from weakref import WeakKeyDictionary
-
 import six
 
 from ..cypher.operations import CypherExpression, CypherOperatorInterface
@@ -12,25 +10,30 @@ except NameError:
 
 
 class SetOnceDescriptor(object):
+    """
+    An attribute which can be set only once (setting None doesn't count).
+    The value is kept on the instance itself, under the attribute's own name
+    in its __dict__; as a data descriptor this still takes precedence.
+    """
     def __init__(self, name, type=None):
         self.name = name
         self.type = type
-        self.values = WeakKeyDictionary()
 
     def __get__(self, instance, owner):
         if instance is None:
-            return getattr(owner, self.name)
+            return self
 
-        return self.values.get(instance)
+        return instance.__dict__.get(self.name)
 
     def __set__(self, instance, value):
-        if self.values.get(instance) is not None:
+        values = instance.__dict__
+        if values.get(self.name) is not None:
             raise ImmutableAttributeError(self.name, instance)
 
         if self.type is not None and value is not None:
-            self.values[instance] = self.type(value)
+            values[self.name] = self.type(value)
         else:
-            self.values[instance] = value
+            values[self.name] = value
 
     def __delete__(self, instance):
         raise ImmutableAttributeError(self.name, instance)
@@ -79,6 +82,10 @@ class GraphObject(object):
         return '{%s}' % ', '.join('%s: {%s}' % (prop, self[prop].param)
                                                 for prop in self.bound_keys)
 
+    def inline_row_properties(self, row):
+        return '{%s}' % ', '.join('%s: %s' % (prop, row[prop].var)
+                                              for prop in self.bound_keys)
+
     @property
     def properties(self):
         return dict(zip(self.keys(), (p.value for p in self.values())))
@@ -153,7 +160,7 @@ class Property(CypherOperatorInterface):
                         indexed=self.indexed, unique=self.unique,
                         required=self.required, primary_key=self.primary_key,
                         read_only=self.read_only)
-        copy.value = self.value
+        copy.load(self.value)
         return copy
 
     @property
@@ -197,11 +204,19 @@ class Property(CypherOperatorInterface):
 
     @value.setter
     def value(self, value):
+        self.__value = self.coerce(value)
+
+    def load(self, value):
+        """Set a value which is already coerced (or came from the graph)"""
+        self.__value = value
+
+    def coerce(self, value):
+        """Get the value this property would hold if set to value"""
         if value is None:
             value = self.default() if callable(self.default) else self.default
         if value is not None:
             value = self.type(value)
-        self.__value = value
+        return value
 
     @property
     def var(self):
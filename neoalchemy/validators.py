@@ -1,7 +1,13 @@
-import dateutil.parser
+from collections import OrderedDict
+import datetime
+import re
 import socket
+import threading
 import uuid
 
+import dateutil.parser
+import dateutil.tz
+
 
 def IPv4(ip_addr):
     """
@@ -48,9 +54,47 @@ def IP(ip_addr):
         return IPv6(ip_addr)
 
 
+ISO_8601 = re.compile(r'(\d{4})-(\d\d)-(\d\d)'
+                      r'(?:[T ](\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6}))?)?'
+                      r'(Z|[+-]\d\d:?\d\d)?)?$')
+
+
+def _parse_iso(date_str):
+    """
+    Strictly parse an ISO-8601 date or datetime, returning None if the
+    string isn't in that format.
+    """
+    match = ISO_8601.match(date_str)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+    if tz is None:
+        tzinfo = None
+    elif tz == 'Z':
+        tzinfo = dateutil.tz.tzutc()
+    else:
+        offset = int(tz[1:3]) * 3600 + int(tz[-2:]) * 60
+        if tz[0] == '-':
+            offset = -offset
+        tzinfo = dateutil.tz.tzoffset(None, offset)
+    return datetime.datetime(int(year), int(month), int(day),
+                             int(hour or 0), int(minute or 0),
+                             int(second or 0),
+                             int((fraction or '0').ljust(6, '0')), tzinfo)
+
+
 def _parse_date(date_str):
+    value = str(date_str)
+    try:
+        parsed = _parse_iso(value)
+    except ValueError:
+        parsed = None
+    if parsed is not None:
+        return parsed
+
     try:
-        return dateutil.parser.parse(str(date_str))
+        return dateutil.parser.parse(value)
     except:
         raise ValueError("Cannot parse %s as date." %
                          date_str.__class__.__name__)
@@ -76,6 +120,39 @@ def isodatetime(datetime_):
     return _parse_date(datetime_).isoformat()
 
 
+def memoize(validator, max_size=1024):
+    """
+    Wrap a validator with a bounded LRU cache of its results, for data in
+    which the same values come up again and again (e.g. dates in a bulk
+    import). Only use it with validators whose result depends on nothing
+    but the value.
+    """
+    max_size = int(max_size)
+    results = OrderedDict()
+    lock = threading.Lock()
+
+    def memoized_validator(value):
+        try:
+            with lock:
+                result = results.pop(value)
+                results[value] = result
+                return result
+        except KeyError:
+            pass
+        except TypeError:
+            return validator(value)
+
+        result = validator(value)
+        with lock:
+            results[value] = result
+            while len(results) > max_size:
+                results.popitem(last=False)
+        return result
+
+    memoized_validator.cache = results
+    return memoized_validator
+
+
 def UUID(id_):
     """
     Validator for a valid UUID. Relies on Python's uuid.UUID validator.
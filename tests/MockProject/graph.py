@@ -2,14 +2,21 @@ import os
 import pytest
 
 from neoalchemy import Graph, OGMBase
-from neoalchemy.graph import Query, Schema
+from neoalchemy.graph import Query, Rehydrator, Schema
 
 
 class FakeQuery(Query):
+    def __init__(self, graph):
+        super(FakeQuery, self).__init__(graph)
+        self.__graph = graph
+
     def run(self, query, **params):
-        self.log(query, params)
+        self.log(str(query), params)
         return ()
 
+    def stream(self, query, **params):
+        return Rehydrator(self.run(query, **params), self.__graph)
+
 
 class FakeQueryContextManager(object):
     def __init__(self, fake_query):
@@ -59,6 +66,11 @@ class FakeGraph(Graph):
             return super(FakeGraph, self).session()
         return FakeQueryContextManager(self.__query)
 
+    def transaction(self, commit_every=None):
+        if self.__connected:
+            return super(FakeGraph, self).transaction(commit_every)
+        return FakeQueryContextManager(self.__query)
+
 
 class OGMTestClass(OGMBase):
     graph = FakeGraph()
@@ -0,0 +1,47 @@
+"""Compiled query cache tests"""
+from neoalchemy import Create, Node, Property
+from neoalchemy.cypher import QueryCache, QueryTemplate
+from MockProject.customers import Customer
+from MockProject.orders import Order
+
+
+def test_template_rebinds_params():
+    user = Node('User', name=Property(), age=Property(type=int))
+    template = QueryTemplate(Create(user), node=user)
+    assert template.cacheable
+    user.name, user.age = 'Frank', '29'
+    query, params = template.bind(node=user)
+    assert query == str(Create(user))
+    assert params == Create(user).params == {'node_name': 'Frank',
+                                             'node_age': 29}
+
+
+def test_cache_hits_misses_and_eviction():
+    cache = QueryCache(max_size=2)
+    user = Node('User', name=Property())
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.template(key, lambda: Create(user), node=user)
+    assert len(cache) == 2
+    assert cache.stats == {'size': 2, 'max_size': 2, 'hits': 1,
+                           'misses': 4, 'evictions': 2}
+    cache.clear()
+    assert cache.stats['size'] == cache.stats['hits'] == 0
+
+
+def test_ogm_queries_are_cached():
+    Customer.query_cache.clear()
+    log = Customer.graph.query.log
+    for i in range(3):
+        customer = Customer(username='user%i' % i, email='user%i@x.com' % i)
+        customer.merge()
+        assert log[-1].params == {'node_username': 'user%i' % i,
+                                  'node_email': 'user%i@x.com' % i}
+    assert Customer.query_cache.hits == 2
+    assert Customer.query_cache.misses == 1
+    order = Order()
+    customer.orders.create(order)
+    customer.orders.create(order)
+    assert log[-1].query == log[-2].query
+    assert log[-1].params == {'self_email': 'user2@x.com',
+                              'related_id': order.id}
+    assert Customer.query_cache.hits == 3
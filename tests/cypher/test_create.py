@@ -2,6 +2,7 @@
 import pytest
 
 from neoalchemy import Create, Match, Node, Property, Relationship
+from neoalchemy.cypher import UnwindRows
 from neoalchemy.exceptions import DetachedObjectError
 
 
@@ -39,18 +40,22 @@ def test_create_node_two_props():
     assert create.params['node_name'] is None
     assert 'node_age' in create.params
     assert create.params['node_age'] is None
+    # a later SET gets its own parameter rather than overwriting the
+    # first SET's, which is still rendered as {node_name}
     create.set(user['name'] == 'Frank')
-    assert len(create.params) == 2
-    assert 'node_name' in create.params
-    assert create.params['node_name'] == 'Frank'
-    assert 'node_age' in create.params
+    assert len(create.params) == 3
+    assert create.params['node_name'] is None
+    assert create.params['param0'] == 'Frank'
     assert create.params['node_age'] is None
     create.set(user['age'] == '29')
-    assert len(create.params) == 2
-    assert 'node_name' in create.params
-    assert create.params['node_name'] == 'Frank'
-    assert 'node_age' in create.params
-    assert create.params['node_age'] == 29
+    assert len(create.params) == 4
+    assert create.params['node_name'] is None
+    assert create.params['node_age'] is None
+    assert create.params['param1'] == 29
+    assert str(create).split('\n')[2:] == [
+        '    SET node.name = {param0}',
+        '    SET node.age = {param1}',
+    ]
 
 
 def test_create_node_two_labels():
@@ -264,3 +269,17 @@ def test_arithmetic_cypher_expressions():
     assert str(match) == '\n'.join(expected_stmt)
     assert match.params['n_age'] == 4
     assert match.params['param0'] == 13
+
+
+def test_unwind_create():
+    expected_stmt = (
+        'UNWIND {rows} AS row\n'
+        'CREATE (node:`User`)\n'
+        '    SET node = row'
+    )
+    user = Node('User', name=Property())
+    rows = [{'name': 'Frank'}, {'name': 'Ali'}]
+    unwind = UnwindRows(rows)
+    create = unwind & Create(user, row=unwind.row)
+    assert str(create) == expected_stmt
+    assert create.params == {'rows': rows}
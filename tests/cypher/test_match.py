@@ -245,3 +245,61 @@ def test_merge_on_create_on_match():
     assert merge.params['node_name'] == 'Fred'
     assert 'param0' in merge.params
     assert merge.params['param0'] == 'Bob'
+
+
+def test_many_conditions():
+    person = Node('Person', age=Property(type=int), var='n')
+    match = Match(person)
+    match.where(*(person['age'] != i for i in range(12)))
+    where = str(match).split('\n')[1]
+    # param1 must not be rewritten inside param10 and param11
+    assert where == '    WHERE ' + ' AND '.join(
+        ['n.age <> {n_age}'] +
+        ['n.age <> {param%i}' % i for i in range(11)])
+    assert match.params['n_age'] == 0
+    assert [match.params['param%i' % i] for i in range(11)] == \
+        list(range(1, 12))
+
+
+def test_composed_conditions():
+    a = Node('Person', age=Property(type=int), var='a')
+    b = Node('Person', age=Property(type=int), var='b')
+    query = (Match(a).where(a['age'] > 1, a['age'] < 9) &
+             Match(b).where(b['age'] > 3, b['age'] < 5, b['age'] != 9))
+    lines = str(query).split('\n')
+    assert lines[1] == '    WHERE a.age > {a_age} AND a.age < {param0}'
+    # b's param0 and param1 are both renamed, without clobbering each other
+    assert lines[3] == ('    WHERE b.age > {b_age} AND b.age < {param1} '
+                        'AND b.age <> {param2}')
+    assert query.params == {'a_age': 1, 'param0': 9, 'b_age': 3,
+                            'param1': 5, 'param2': 9}
+
+    union = (Match(a).where(a['age'] > 1, a['age'] < 9) |
+             Match(b).where(b['age'] > 2, b['age'] < 7))
+    assert str(union).split('\n')[-1] == \
+        '    WHERE b.age > {b_age} AND b.age < {param1}'
+    assert union.params == {'a_age': 1, 'param0': 9, 'b_age': 2,
+                            'param1': 7}
+
+
+def test_bound_key_without_value():
+    person = Node('Person', age=Property(type=int), var='n').bind('age')
+    match = Match(person).where(person['age'] > 30)
+    assert str(match).split('\n')[1:] == [
+        '    WHERE n.age = {n_age}',
+        '      AND n.age > {param0}',
+    ]
+    assert match.params == {'n_age': None, 'param0': 30}
+
+    other = Node('Person', var='m')
+    query = Match(person) & Match(other).where(person['age'] > 30)
+    assert str(query).split('\n')[-1] == '    WHERE n.age > {param0}'
+    assert query.params == {'n_age': None, 'param0': 30}
+
+
+def test_nested_expressions():
+    person = Node('Person', age=Property(type=int), var='n')
+    match = Match(person).where(person['age'] == 29)
+    match.where((person['age'] + 1) > 30)
+    assert str(match).split('\n')[2] == '      AND n.age + {param0} > {param1}'
+    assert match.params == {'n_age': 29, 'param0': 1, 'param1': 30}
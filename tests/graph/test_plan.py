@@ -0,0 +1,113 @@
+"""EXPLAIN and PROFILE tests"""
+import pytest
+from neo4j.v1.session import make_plan
+
+from neoalchemy import Graph
+from MockProject.customers import Customer
+from MockProject.graph import FakeQuery
+from test_pool import FakeDriver, FakeSession
+
+
+PLAN = {
+    'operatorType': 'ProduceResults',
+    'identifiers': ['a', 'b'],
+    'args': {'EstimatedRows': 100.0},
+    'children': [{
+        'operatorType': 'CartesianProduct',
+        'identifiers': ['a', 'b'],
+        'args': {'EstimatedRows': 100.0},
+        'children': [
+            {'operatorType': 'NodeByLabelScan', 'identifiers': ['a'],
+             'args': {'EstimatedRows': 10.0, 'LabelName': ':Customer'}},
+            {'operatorType': 'AllNodesScan', 'identifiers': ['b'],
+             'args': {'EstimatedRows': 10.0}},
+        ],
+    }],
+}
+
+
+def profiled(plan):
+    plan = dict(plan, dbHits=int(plan['args']['EstimatedRows']) + 1,
+                rows=int(plan['args']['EstimatedRows']))
+    plan['children'] = [profiled(child) for child in
+                        plan.get('children', [])]
+    return plan
+
+
+class FakeSummary(object):
+    plan = profile = None
+
+
+class FakeResult(list):
+    def __init__(self, query):
+        super(FakeResult, self).__init__()
+        self.summary = FakeSummary()
+        if query.startswith('PROFILE'):
+            self.summary.profile = self.summary.plan = make_plan(
+                profiled(PLAN))
+        elif query.startswith('EXPLAIN'):
+            self.summary.plan = make_plan(PLAN)
+
+    def consume(self):
+        return self.summary
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    graph = Graph()
+    graph.driver = FakeDriver()
+    monkeypatch.setattr(FakeSession, 'run',
+                        lambda self, query, parameters: FakeResult(query))
+    return graph
+
+
+def test_explain(graph):
+    plan = graph.query.explain('MATCH (a:Customer), (b) RETURN a, b')
+    assert graph.query.log[-1].query == \
+        'EXPLAIN MATCH (a:Customer), (b) RETURN a, b'
+    assert plan.query == 'MATCH (a:Customer), (b) RETURN a, b'
+    assert not plan.profiled
+    assert plan.operators == ['ProduceResults', 'CartesianProduct',
+                              'NodeByLabelScan', 'AllNodesScan']
+    assert [step.depth for step in plan.steps] == [0, 1, 2, 2]
+    assert plan.estimated_rows == 100
+    assert plan.rows is None and plan.db_hits is None
+    assert [s.identifiers for s in plan.label_scans] == [('a',)]
+    assert plan.label_scans[0].arguments['LabelName'] == ':Customer'
+    assert [s.identifiers for s in plan.all_nodes_scans] == [('b',)]
+    assert len(plan.cartesian_products) == 1
+    assert str(plan).split('\n')[2] == \
+        '    NodeByLabelScan (estimated rows: 10.0)'
+
+
+def test_profile(graph):
+    plan = graph.query.profile('MATCH (n {x: {x}}) RETURN n', x=1)
+    assert graph.query.log[-1].query == 'PROFILE MATCH (n {x: {x}}) RETURN n'
+    assert plan.params == {'x': 1}
+    assert plan.profiled
+    assert plan.rows == 100
+    assert plan.db_hits == 101 + 101 + 11 + 11
+    assert [(s.rows, s.db_hits) for s in plan.all_nodes_scans] == [(10, 11)]
+    assert str(plan).split('\n')[3] == \
+        '    AllNodesScan (estimated rows: 10.0, rows: 10, db hits: 11)'
+
+
+def test_no_plan(graph, monkeypatch):
+    monkeypatch.setattr(FakeSession, 'run',
+                        lambda self, query, parameters: FakeResult(''))
+    with pytest.raises(RuntimeError):
+        graph.query.explain('RETURN 1')
+
+
+def test_match_profile(monkeypatch):
+    monkeypatch.setattr(FakeQuery, 'run', lambda self, query, **params: (
+        self.log(query, params), FakeResult(query))[1])
+    plan = Customer.match(email='a@b.com').profile()
+    log = Customer.graph.query.log
+    assert log[-1].query.startswith('PROFILE MATCH (node:')
+    assert log[-1].params == {'node_email': 'a@b.com'}
+    assert plan.params == {'node_email': 'a@b.com'}
+    assert plan.db_hits == 224
+
+    assert not Customer.match().explain().profiled
+    assert log[-1].query.startswith('EXPLAIN MATCH (node:')
@@ -0,0 +1,215 @@
+"""Session pool tests"""
+import time
+
+import pytest
+from neo4j.v1 import CypherError, Record
+
+from neoalchemy import Create, Graph, Node, Property
+from neoalchemy.cypher import UnwindRows
+
+
+class FakeConnection(object):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransaction(object):
+    def __init__(self, session):
+        self.session = session
+        self.closed = False
+
+    def run(self, query, parameters=None):
+        self.session.statements.append(query)
+        return ()
+
+    def commit(self):
+        self.session.statements.append('COMMIT')
+        self.closed = True
+
+    def rollback(self):
+        self.session.statements.append('ROLLBACK')
+        self.closed = True
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.last_result = None
+        self.statements = []
+
+    def run(self, query, parameters=None):
+        return (Record(('n',), (i,)) for i in range(3))
+
+    def begin_transaction(self):
+        return FakeTransaction(self)
+
+    @property
+    def healthy(self):
+        return not self.connection.closed
+
+
+class FakeDriver(object):
+    def __init__(self):
+        self.opened = []
+
+    def session(self):
+        session = FakeSession()
+        self.opened.append(session)
+        return session
+
+
+@pytest.fixture
+def graph():
+    graph = Graph(pool_size=2)
+    graph.driver = FakeDriver()
+    return graph
+
+
+def test_sessions_are_reused(graph):
+    for _ in range(5):
+        with graph.pool.session() as session:
+            assert graph.pool.stats.in_use == 1
+    assert len(graph.driver.opened) == 1
+    stats = graph.pool.stats
+    assert (stats.size, stats.in_use, stats.idle) == (2, 0, 1)
+    assert stats.acquired == 5
+
+
+def test_pool_is_bounded(graph):
+    first, second = graph.pool.acquire(), graph.pool.acquire()
+    assert first is not second
+    with pytest.raises(RuntimeError):
+        graph.pool.acquire(timeout=0.01)
+    assert graph.pool.stats.waits == 1
+    assert graph.pool.stats.wait_time > 0
+    graph.pool.release(first)
+    assert graph.pool.acquire(timeout=0.01) is first
+
+
+def test_held_streams_time_out_instead_of_hanging():
+    graph = Graph(pool_size=1, pool_acquire_timeout=0.01)
+    graph.driver = FakeDriver()
+    assert graph.pool.acquire_timeout == 0.01
+    results = graph.query.stream('MATCH (n) RETURN n')
+    next(results)
+    with pytest.raises(RuntimeError):
+        graph.query('RETURN 1')
+    with pytest.raises(RuntimeError):
+        graph.query.stream('MATCH (n) RETURN n')
+    results.close()
+    assert [r['n'] for r in graph.query('RETURN 1')] == [0, 1, 2]
+
+
+def test_failed_and_idle_sessions_are_closed(graph):
+    with pytest.raises(ValueError):
+        with graph.pool.session() as session:
+            raise ValueError
+    assert session.connection.closed
+    assert graph.pool.stats.idle == 0
+
+    graph.pool.warm_up()
+    assert len(graph.driver.opened) == 3
+    assert graph.pool.stats.idle == 2
+    graph.pool.idle_timeout = 0
+    time.sleep(0.01)
+    graph.pool.evict_idle()
+    assert graph.pool.stats.idle == 0
+    assert all(s.connection.closed for s in graph.driver.opened)
+
+
+class FailedResult(object):
+    def buffer(self):
+        raise CypherError({'code': 'Neo.ClientError.Schema.'
+                                   'ConstraintValidationFailed',
+                           'message': 'Node already exists'})
+
+
+def test_server_errors_are_raised(graph, monkeypatch):
+    def run(self, query, parameters=None):
+        self.last_result = FailedResult()
+        return ()
+    monkeypatch.setattr(FakeSession, 'run', run)
+
+    with pytest.raises(CypherError):
+        graph.query('CREATE (n:Customer {email: {email}})', email='a@b.com')
+    assert graph.driver.opened[0].connection.closed
+    assert graph.pool.stats.in_use == graph.pool.stats.idle == 0
+
+    with pytest.raises(CypherError):
+        list(graph.query.stream('CREATE (n)'))
+    assert graph.pool.stats.in_use == graph.pool.stats.idle == 0
+
+
+def test_streamed_results_hold_session_until_exhausted(graph):
+    results = graph.query.stream('MATCH (n) RETURN n')
+    assert graph.pool.stats.in_use == 1
+    assert [record['n'] for record in results] == [0, 1, 2]
+    assert graph.pool.stats.in_use == 0
+    assert graph.pool.stats.idle == 1
+
+
+def test_closing_stream_early_discards_session(graph):
+    with graph.query.stream('MATCH (n) RETURN n') as results:
+        assert next(results)['n'] == 0
+        assert graph.pool.stats.in_use == 1
+    assert graph.pool.stats.in_use == graph.pool.stats.idle == 0
+    assert graph.driver.opened[0].connection.closed
+    with pytest.warns(UserWarning):
+        assert graph.query.stream('MATCH (n) RETURN n').one == 0
+    assert graph.pool.stats.in_use == 0
+
+
+def test_transaction(graph):
+    with graph.transaction() as tx:
+        assert graph.current_transaction is tx
+        graph.query('CREATE (n)')
+        with graph.transaction() as inner:
+            assert inner is tx
+            graph.query('CREATE (m)')
+        assert graph.pool.stats.in_use == 1
+    assert graph.current_transaction is None
+    assert graph.pool.stats.in_use == 0
+    session = graph.driver.opened[0]
+    assert session.statements == ['CREATE (n)', 'CREATE (m)', 'COMMIT']
+
+    with pytest.raises(ValueError):
+        with graph.transaction():
+            graph.query('CREATE (n)')
+            raise ValueError
+    assert session.statements[-1] == 'ROLLBACK'
+    assert session.connection.closed
+
+
+def test_run_many(graph):
+    queries = ['RETURN 1', ('RETURN {x}', {'x': 2}), 'RETURN 3']
+    results = graph.query.run_many(queries, max_workers=2)
+    assert [[r['n'] for r in result] for result in results] == [[0, 1, 2]] * 3
+    assert len(graph.driver.opened) <= 2
+    assert sorted(line.query for line in graph.query.log) == [
+        'RETURN 1', 'RETURN 3', 'RETURN {x}']
+    assert all(line.time is not None for line in graph.query.log)
+    completed = graph.query.run_many(queries, ordered=False)
+    assert sorted(index for index, _ in completed) == [0, 1, 2]
+    assert graph.query.run_many([]) == []
+
+
+def test_transaction_commit_every(graph):
+    unwind = UnwindRows([{'x': 1}, {'x': 2}])
+    unwind &= Create(Node('N', x=Property()), row=unwind.row)
+    with graph.transaction(commit_every=3) as tx:
+        graph.query('CREATE (n)')
+        graph.query(unwind, **unwind.params)
+        graph.query('CREATE (n)')
+        assert tx.commits == 1
+        assert tx.pending == 1
+        # a list parameter that happens to be called rows is one statement
+        graph.query('UNWIND {rows} AS row CREATE (n)', rows=[1, 2, 3])
+        assert tx.commits == 1
+        assert tx.pending == 2
+    assert tx.commits == 2
+    session = graph.driver.opened[0]
+    assert session.statements == [
+        'CREATE (n)', str(unwind), 'COMMIT',
+        'CREATE (n)', 'UNWIND {rows} AS row CREATE (n)', 'COMMIT']
@@ -0,0 +1,121 @@
+"""Query log timing tests"""
+import logging
+
+import pytest
+from neo4j.v1 import Node as NeoNode, Record
+
+from neoalchemy import Graph
+from neoalchemy.graph import LatencyHistogram, QueryStats, fingerprint
+from MockProject.customers import Customer
+from test_pool import FakeDriver, FakeSession
+
+
+@pytest.fixture
+def graph():
+    graph = Graph(pool_size=2)
+    graph.driver = FakeDriver()
+    return graph
+
+
+def test_run_is_timed(graph):
+    result = graph.query('RETURN 1')
+    line = graph.query.log[-1]
+    assert line.time is not None and line.rows is None
+    assert [r['n'] for r in result] == [0, 1, 2]
+    assert line.rows == 3
+    assert graph.query.log.stats['RETURN 1'].calls == 1
+    assert graph.query.log.stats['RETURN 1'].rows == 3
+
+
+def test_stream_is_timed(graph, monkeypatch):
+    node = NeoNode(Customer.__node__.labels, {'email': 'a@b.com'})
+    monkeypatch.setattr(FakeSession, 'run', lambda self, q, parameters: (
+        Record(('n',), (node,)) for _ in range(2)))
+
+    results = graph.query.stream('MATCH (n) RETURN n')
+    line = graph.query.log[-1]
+    assert line.time is None
+    assert not graph.query.log.stats
+    assert [r[0].email for r in results] == ['a@b.com'] * 2
+    assert line.rows == 2
+    assert line.time >= line.first_record >= 0
+    assert line.hydration >= 0
+    assert line.fetch + line.hydration <= line.time
+    stats = graph.query.log.stats['MATCH (n) RETURN n']
+    assert (stats.calls, stats.rows) == (1, 2)
+    assert stats.histogram.count == 1
+
+
+def test_empty_and_abandoned_streams(graph, monkeypatch):
+    monkeypatch.setattr(FakeSession, 'run',
+                        lambda self, q, parameters: iter(()))
+    assert list(graph.query.stream('RETURN 1')) == []
+    assert graph.query.log[-1].rows == 0
+    assert graph.query.log[-1].first_record is None
+
+    monkeypatch.undo()
+    with graph.query.stream('RETURN 2') as results:
+        next(results)
+    assert graph.query.log[-1].rows == 1
+    assert graph.query.log[-1].time is not None
+
+
+def test_slow_query_log(graph, caplog):
+    log = graph.query.log
+    graph.query('RETURN 1')
+    assert not log.slow
+
+    log.slow_threshold = 0
+    with caplog.at_level(logging.WARNING, logger='neoalchemy.slow_query'):
+        graph.query('RETURN 2')
+    assert [line.query for line in log.slow] == ['RETURN 2']
+    assert 'RETURN 2' in caplog.text
+
+
+def test_fingerprint():
+    assert fingerprint('MATCH (n)\n    WHERE n.x = {param12}\n'
+                       'RETURN n SKIP 20 LIMIT 10') == \
+        'MATCH (n) WHERE n.x = {?} RETURN n SKIP ? LIMIT ?'
+    assert fingerprint('MATCH (n {node_email}) RETURN n limit 5') == \
+        'MATCH (n {node_email}) RETURN n limit ?'
+    assert fingerprint('MATCH (n:Label2) RETURN n.param1') == \
+        'MATCH (n:Label2) RETURN n.param1'
+
+
+def test_stats_by_fingerprint(graph):
+    for i in range(3):
+        list(graph.query('MATCH (n) WHERE n.x = {param%i} RETURN n '
+                         'LIMIT %i' % (i, i + 1)))
+    graph.query('RETURN 1')
+    stats = graph.query.log.stats
+    assert len(stats) == 2
+    match = stats['MATCH (n) WHERE n.x = {param0} RETURN n LIMIT 1']
+    assert (match.calls, match.rows) == (3, 9)
+    assert match.query.endswith('LIMIT 1')
+    assert match.mean_time == match.total_time / 3
+    assert 0 < match.p99 <= 0.001
+    assert stats.top(1, by='calls') == [match]
+    stats.clear()
+    assert 'RETURN 1' not in stats
+
+
+def test_stats_are_bounded(graph, monkeypatch):
+    monkeypatch.setattr(QueryStats, 'MAX_SIZE', 2)
+    for i in range(3):
+        graph.query('RETURN %i' % i)
+    graph.query('RETURN 1')
+    assert [s.query for s in graph.query.log.stats] == [
+        'RETURN 2', 'RETURN 1']
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for elapsed in [0.0005] * 98 + [0.03, 20]:
+        histogram.add(elapsed)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 1
+    assert histogram.percentile(99) == 50
+    # the overflow bucket reports the slowest time seen
+    assert histogram.percentile(100) == histogram.max == 20000
+    assert histogram.buckets[0] == (1, 98)
+    assert LatencyHistogram().percentile(99) == 0
@@ -0,0 +1,34 @@
+"""Rehydrator tests"""
+from neo4j.v1 import Node as NeoNode, Record
+
+from neoalchemy import Node
+from neoalchemy.graph import Rehydrator
+from MockProject.addresses import Address, DomesticAddress
+from MockProject.customers import Customer
+
+
+def hydrate(*nodes):
+    records = [Record(('n',), (node,)) for node in nodes]
+    return [record['n'] for record in Rehydrator(records, Customer.graph)]
+
+
+def test_resolve_ignores_label_order():
+    schema = Customer.graph.schema
+    labels = list(DomesticAddress.__node__.labels)
+    assert schema.resolve(labels) is DomesticAddress
+    assert schema.resolve(reversed(labels)) is DomesticAddress
+    assert schema.resolve(labels + ['Extra']) is DomesticAddress
+    assert schema.resolve(['Unknown']) is None
+
+
+def test_rehydrate_nodes():
+    customer, address, other = hydrate(
+        NeoNode(reversed(Customer.__node__.labels), {'email': 'a@b.com'}),
+        NeoNode(Address.__node__.labels, {'city': 'Boston'}),
+        NeoNode(['Unknown'], {'name': 'x'}),
+    )
+    assert isinstance(customer, Customer)
+    assert customer.email == 'a@b.com'
+    assert type(address) is Address
+    assert address.city == 'Boston'
+    assert type(other) is Node
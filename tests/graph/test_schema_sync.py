@@ -0,0 +1,69 @@
+"""Schema sync tests"""
+from MockProject.graph import FakeGraph
+
+from neoalchemy import Node, Property
+from neoalchemy.graph import Schema
+
+
+def queries(graph):
+    return [line.query for line in graph.query.log]
+
+
+def test_create_writes_missing_schema():
+    graph = FakeGraph()
+    schema = Schema(graph)
+    schema.create(Node('Person', name=Property(indexed=True)))
+    assert 'CREATE INDEX ON :Person(name)' in queries(graph)
+    assert schema.indexes() == ('INDEX ON :Person(name)',)
+
+
+def test_create_uses_cached_schema():
+    graph = FakeGraph()
+    schema = Schema(graph)
+    schema.create(Node('Person', name=Property(indexed=True)))
+    graph.query.log.clear()
+    schema.create(Node('Animal', name=Property(unique=True)))
+    # cache was updated locally, so the graph is not reflected again
+    assert queries(graph) == ['CREATE CONSTRAINT ON ( animal:Animal ) '
+                              'ASSERT animal.name IS UNIQUE']
+
+
+def test_deferred_sync():
+    graph = FakeGraph()
+    schema = Schema(graph)
+    with schema.deferred():
+        schema.create(Node('Person', name=Property(indexed=True)))
+        schema.create(Node('Animal', name=Property(indexed=True)))
+        assert not [q for q in queries(graph) if q.startswith('CREATE')]
+    log = queries(graph)
+    assert log.count('CALL db.indexes()') == 1
+    assert log.count('CALL db.constraints()') == 1
+    assert 'CREATE INDEX ON :Person(name)' in log
+    assert 'CREATE INDEX ON :Animal(name)' in log
+    assert set(schema.indexes()) == {'INDEX ON :Person(name)',
+                                     'INDEX ON :Animal(name)'}
+
+
+def test_sync_reflects_graph():
+    graph = FakeGraph()
+    schema = Schema(graph)
+    schema.create(Node('Person', name=Property(indexed=True)))
+    created = schema.sync(wait=True)
+    # the fake graph reports no schema, so it is all missing again
+    assert created == ['INDEX ON :Person(name)']
+    assert queries(graph)[-1] == 'CALL db.awaitIndexes({timeout})'
+    graph.query.log.clear()
+    assert schema.sync(wait=True) == ['INDEX ON :Person(name)']
+
+
+def test_drop_updates_cache():
+    graph = FakeGraph()
+    schema = Schema(graph)
+    person = Node('Person', name=Property(indexed=True))
+    schema.create(person)
+    schema.drop(person)
+    assert 'DROP INDEX ON :Person(name)' in queries(graph)
+    assert schema.indexes() == ()
+    graph.query.log.clear()
+    assert schema.sync() == []
+    assert not [q for q in queries(graph) if q.startswith('CREATE')]
@@ -0,0 +1,115 @@
+"""OGM batch operation tests"""
+import re
+
+import pytest
+
+from neoalchemy.exceptions import UnboundedWriteOperation
+from MockProject.addresses import Address
+from MockProject.customers import Customer
+from MockProject.orders import Order
+
+
+def last_queries(cls, n):
+    return list(cls.graph.query.log)[-n:]
+
+
+def test_create_many():
+    customers = [Customer(username='user%i' % i, email='user%i@x.com' % i)
+                 for i in range(5)]
+    assert Customer.create_many(customers, batch_size=2) == customers
+    queries = last_queries(Customer, 3)
+    for log_line in queries:
+        assert log_line.query.startswith('UNWIND {rows} AS row\nCREATE (node:')
+        assert log_line.query.endswith('\n    SET node = row')
+    assert [len(q.params['rows']) for q in queries] == [2, 2, 1]
+    assert queries[0].params['rows'][0] == {'username': 'user0',
+                                            'email': 'user0@x.com'}
+    # logged rows are copies, unaffected by later changes
+    customers[0].username = 'changed'
+    assert queries[0].params['rows'][0]['username'] == 'user0'
+
+
+def test_create_many_wrong_class():
+    with pytest.raises(ValueError):
+        Customer.create_many([Order()])
+    with pytest.raises(ValueError):
+        Customer.create_many([Customer()], batch_size=0)
+
+
+def test_merge_many():
+    customers = [Customer(username='user%i' % i, email='user%i@x.com' % i)
+                 for i in range(3)]
+    customers[2].username = 'renamed'
+    assert Customer.merge_many(customers) == customers
+    unchanged, changed = last_queries(Customer, 2)
+    unwind, merge, on_create, set_ = unchanged.query.split('\n')
+    labels, props = re.match(r'MERGE \(node((?::`\w+`)+) (.*)\)$',
+                             merge).groups()
+    assert set(labels.split(':')[1:]) == {'`Customer`', '`OGMBase`'}
+    assert (unwind, props, on_create, set_) == (
+        'UNWIND {rows} AS row', '{email: row.email}', 'ON CREATE',
+        '    SET node = row')
+    assert len(unchanged.params['rows']) == 2
+    customers[0].username = 'changed'
+    assert unchanged.params['rows'][0]['username'] == 'user0'
+    assert changed.query.endswith('\nON MATCH\n'
+                                  '    SET node.username = row.username')
+    assert changed.params['rows'] == [{'username': 'renamed',
+                                       'email': 'user2@x.com'}]
+    assert Customer.merge_many(customers, hydrate=True) == []
+    assert last_queries(Customer, 1)[0].query.endswith('\nRETURN node')
+
+
+def test_merge_many_unbound():
+    with pytest.raises(ValueError):
+        Customer.merge_many([Order()])
+    with pytest.raises(UnboundedWriteOperation):
+        Address.merge_many([Address(city='Boston')])
+    Address.merge_many([Address(city='Boston')], singleton=True)
+    assert last_queries(Address, 1)[0].query.startswith(
+        'UNWIND {rows} AS row\nMERGE (node:')
+
+
+def test_create_relations():
+    customer = Customer(username='seregon', email='seregon@gmail.com')
+    orders = [Order(), Order(), Order()]
+    assert customer.orders.create_many(orders, batch_size=2) == 0
+    first, second = last_queries(Customer, 2)
+    assert first.query.startswith('UNWIND {rows} AS row\nMATCH (self:')
+    assert '    WHERE self.email = row.start.email\n' in first.query
+    assert '    WHERE related.id = row.end.id\n' in first.query
+    assert first.query.endswith(
+        'CREATE (self)-[rel:`PLACED_ORDER`]->(related)\n'
+        'RETURN COUNT(rel) AS rel_count')
+    assert first.params['rows'] == [
+        {'start': {'email': 'seregon@gmail.com'}, 'end': {'id': order.id}}
+        for order in orders[:2]]
+    assert len(second.params['rows']) == 1
+    # rows are built without materializing either end's Node
+    assert '__node__' not in vars(customer)
+    assert not any('__node__' in vars(order) for order in orders)
+
+    Customer.orders.merge_many((customer, order) for order in orders)
+    query = last_queries(Customer, 1)[0]
+    assert 'MERGE (self)-[rel:`PLACED_ORDER`]->(related)' in query.query
+    assert len(query.params['rows']) == 3
+
+
+def test_create_relations_checks():
+    customer = Customer(username='seregon', email='seregon@gmail.com')
+    with pytest.raises(ValueError):
+        customer.orders.create_many([Address()])
+    with pytest.raises(ValueError):
+        Customer.orders.create_many([Order()])
+    with pytest.raises(UnboundedWriteOperation):
+        customer.addresses.create_many([Address(city='Boston')])
+    assert customer.orders.merge_many([]) == 0
+
+
+def test_match_many():
+    log = Customer.graph.query.log
+    log.clear()
+    results = Customer.match_many([{'email': 'a@x.com'}, {'email': 'b@x.com'}])
+    assert len(results) == 2
+    assert sorted(line.params['node_email'] for line in log) == ['a@x.com',
+                                                                 'b@x.com']
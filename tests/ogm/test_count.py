@@ -0,0 +1,44 @@
+"""OGM count and exists tests"""
+from MockProject.addresses import DomesticAddress
+from MockProject.customers import Customer
+
+
+def test_count_label_fast_path():
+    graph = DomesticAddress.graph
+    assert DomesticAddress.count() == 0
+    assert graph.query.log[-1].query == '\n'.join((
+        'MATCH (node:`DomesticAddress`)',
+        'RETURN COUNT(node) AS node_count',
+    ))
+    assert graph.query.log[-1].params == {}
+
+
+def test_count_with_filters():
+    graph = Customer.graph
+    assert Customer.count(email='a@b.com') == 0
+    query = graph.query.log[-1].query.split('\n')
+    assert query[0].startswith('MATCH (node:')
+    assert query[1:] == ['    WHERE node.email = {node_email}',
+                         'RETURN COUNT(node) AS node_count']
+    assert graph.query.log[-1].params == {'node_email': 'a@b.com'}
+    Customer.match(email='c@d.com').count()
+    assert graph.query.log[-1].params == {'node_email': 'c@d.com'}
+
+
+def test_exists():
+    graph = Customer.graph
+    assert Customer.exists(email='a@b.com') is False
+    assert graph.query.log[-1].query.split('\n')[1:] == [
+        '    WHERE node.email = {node_email}',
+        'WITH node',
+        'LIMIT 1',
+        'RETURN COUNT(node) AS node_count',
+    ]
+
+
+def test_count_result(monkeypatch):
+    graph = Customer.graph
+    monkeypatch.setattr(graph.query, 'run',
+                        lambda query, **params: [(42,)])
+    assert Customer.count() == 42
+    assert Customer.exists()
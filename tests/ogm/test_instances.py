@@ -0,0 +1,79 @@
+"""OGM instance state tests"""
+import pytest
+
+from MockProject.customers import Customer
+from MockProject.orders import Order, OrderItem
+
+
+def test_instances_share_class_properties():
+    item = OrderItem(line_item='bread', price=2)
+    assert '__node__' not in vars(item)
+    assert item.line_item == 'bread'
+    assert item.price == '2.00'
+    assert OrderItem.price is OrderItem.__node__['price']
+    assert '__node__' not in vars(item)
+
+
+def test_node_built_on_demand():
+    item = OrderItem(line_item='bread', price=2)
+    item.price = 3
+    node = item.__node__
+    assert node is not OrderItem.__node__
+    assert node.properties == {'line_item': 'bread', 'price': '3.00'}
+    assert item.__node__ is node
+    # later changes reach the node used for queries
+    item.line_item = 'milk'
+    assert node['line_item'].value == 'milk'
+    assert OrderItem.__node__['line_item'].value is None
+
+
+def test_changes_are_tracked():
+    customer = Customer(email='a@b.com')
+    customer.email = 'a@b.com'
+    assert customer.__changed__ == {}
+    customer.username = 'alice'
+    assert customer.__changed__ == {'username': (None, 'alice')}
+
+
+def test_defaults_per_instance():
+    assert Order().id != Order().id
+
+
+def test_unknown_argument():
+    with pytest.raises(ValueError):
+        Customer(name='alice')
+
+
+def test_binding():
+    customer = Customer(email='a@b.com')
+    assert not customer.is_bound
+    assert customer.bind().bound_keys == ('email',)
+    assert customer.is_bound
+
+
+def test_trusted_hydration():
+    order = Order.hydrate({'id': 'stored-id', 'extra': 1})
+    assert order.id == 'stored-id'
+    assert order.__changed__ == {}
+    assert order.items.obj is order
+
+
+def test_untrusted_hydration(monkeypatch):
+    monkeypatch.setattr(Order, 'TRUSTED_HYDRATION', False)
+    with pytest.raises(ValueError):
+        Order.hydrate({'id': 'stored-id'})
+    order_id = '6f2a7a4e-45b9-4b7e-a3a4-3f4b8f6f0d6c'
+    assert Order.hydrate({'id': order_id}).id == order_id
+
+
+def test_hydrated_values_reach_queries_as_loaded():
+    order = Order.hydrate({})
+    assert order.id is None
+    assert order.__node__['id'].value is None
+    order.delete()
+    assert Order.graph.query.log[-1].params == {'node_id': None}
+
+    order = Order.hydrate({'id': 'a4b1c2d3-0000-0000-0000-000000000000'})
+    order.id = None
+    assert order.id is not None
+    assert order.__node__['id'].value == order.id
@@ -0,0 +1,81 @@
+"""OGM projection tests"""
+from neo4j.v1 import Record
+import pytest
+
+from neoalchemy.exceptions import PartialObjectError
+from neoalchemy.graph import Rehydrator
+from MockProject.customers import Customer
+from MockProject.orders import Order
+
+
+def test_only_query():
+    query, params = (Customer.match(email='a@b.com')
+                     .only(Customer.username, 'email').compile())
+    assert query.split('\n')[1:] == [
+        '    WHERE node.email = {node_email}',
+        'RETURN {username: node.username, email: node.email} AS node',
+    ]
+    assert params == {'node_email': 'a@b.com'}
+    with pytest.raises(ValueError):
+        Customer.match().only('nope')
+
+
+def test_only_with_prefetch():
+    query, _ = Customer.match().prefetch('orders').only('email').compile()
+    assert query.split('\n')[-1] == \
+        'RETURN {email: node.email} AS node, orders_collect'
+
+
+def test_partial_objects():
+    records = [Record(('node',), ({'email': 'a@b.com'},))]
+    customer = next(Rehydrator(records, Customer.graph)
+                    .partial(Customer))['node']
+    assert isinstance(customer, Customer)
+    assert customer.is_partial
+    assert customer.email == 'a@b.com'
+    with pytest.raises(AttributeError):
+        customer.username
+    with pytest.raises(PartialObjectError):
+        customer.merge()
+    with pytest.raises(PartialObjectError):
+        customer.create()
+    with pytest.raises(PartialObjectError):
+        Customer.merge_many([customer])
+
+    customer.username = 'alice'
+    assert not customer.is_partial
+    assert customer.__changed__ == {'username': (None, 'alice')}
+    customer.merge()
+
+
+def test_untrusted_partial(monkeypatch):
+    monkeypatch.setattr(Customer, 'TRUSTED_HYDRATION', False)
+    customer = Customer.hydrate({'email': 'a@b.com'}, partial=True)
+    assert customer.is_partial
+    assert customer.email == 'a@b.com'
+
+
+def test_partial_objects_need_their_bound_keys():
+    log = Customer.graph.query.log
+    customer = Customer.hydrate({'email': 'a@b.com'}, partial=True)
+    order = Order()
+    # the keys used to find the nodes were loaded, so these can run
+    customer.orders.create(order)
+    assert log[-1].params['self_email'] == 'a@b.com'
+    Customer.create_relations('PLACED_ORDER', [(customer, order)])
+    customer.delete()
+    assert log[-1].params == {'node_email': 'a@b.com'}
+
+    nameless = Customer.hydrate({'username': 'alice'}, partial=True)
+    log.clear()
+    with pytest.raises(PartialObjectError):
+        nameless.delete()
+    with pytest.raises(PartialObjectError):
+        nameless.orders.create(order)
+    with pytest.raises(PartialObjectError):
+        nameless.orders.merge(order)
+    with pytest.raises(PartialObjectError):
+        nameless.orders.delete(order)
+    with pytest.raises(PartialObjectError):
+        Customer.merge_relations('PLACED_ORDER', [(nameless, order)])
+    assert not log
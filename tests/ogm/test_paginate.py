@@ -0,0 +1,70 @@
+"""OGM keyset pagination tests"""
+from neo4j.v1 import Node as NeoNode, Record
+import pytest
+
+from neoalchemy.graph import Rehydrator
+from MockProject.customers import Customer
+
+
+@pytest.fixture
+def customers(monkeypatch):
+    graph = Customer.graph
+    emails = sorted('%02i@x.com' % i for i in range(7))
+    calls = []
+
+    def stream(query, **params):
+        calls.append((query, params))
+        last = params.get('last_email')
+        page = [e for e in emails if last is None or e > last][:3]
+        return Rehydrator([Record(('node',), (
+            NeoNode(Customer.__node__.labels, {'email': e}),))
+            for e in page], graph)
+
+    monkeypatch.setattr(graph.query, 'stream', stream)
+    return calls
+
+
+def test_paginate(customers):
+    pages = list(Customer.match().paginate(by=Customer.email, page_size=3))
+    assert [[c.email for c in page] for page in pages] == [
+        ['00@x.com', '01@x.com', '02@x.com'],
+        ['03@x.com', '04@x.com', '05@x.com'],
+        ['06@x.com'],
+    ]
+    first, second, third = customers
+    assert first[0].split('\n')[1:] == ['RETURN node', 'ORDER BY node.email',
+                                        'LIMIT 3']
+    assert first[1] == {}
+    assert second[0].split('\n')[1:] == [
+        '    WHERE node.email > {last_email}',
+        'RETURN node', 'ORDER BY node.email', 'LIMIT 3',
+    ]
+    assert second[1] == {'last_email': '02@x.com'}
+    assert third[1] == {'last_email': '05@x.com'}
+
+
+def test_paginate_with_filters_and_prefetch(customers):
+    pages = (Customer.match(username='bob').prefetch('orders')
+             .paginate(by='email', page_size=3))
+    next(pages)
+    next(pages)
+    query, params = customers[-1]
+    assert query.split('\n')[1:] == [
+        '    WHERE node.username = {node_username}',
+        '      AND node.email > {last_email}',
+        'WITH node',
+        'ORDER BY node.email',
+        'LIMIT 3',
+        'OPTIONAL MATCH (node)-[orders_rel:`PLACED_ORDER`]->(orders)',
+        'WITH node, COLLECT(orders) AS orders_collect',
+        'RETURN node, orders_collect',
+        'ORDER BY node.email',
+    ]
+    assert params == {'node_username': 'bob', 'last_email': '02@x.com'}
+
+
+def test_paginate_checks():
+    with pytest.raises(ValueError):
+        next(Customer.match().paginate(by='nope'))
+    with pytest.raises(ValueError):
+        next(Customer.match().paginate(by='email', page_size=0))
@@ -0,0 +1,122 @@
+"""OGM eager loading tests"""
+from neo4j.v1 import Node as NeoNode, Record
+import pytest
+
+from neoalchemy.graph import Rehydrator
+from MockProject.addresses import Address
+from MockProject.customers import Customer
+from MockProject.orders import Order
+
+
+def test_match_is_lazy():
+    log = Customer.graph.query.log
+    log.clear()
+    matched = Customer.match(email='a@b.com')
+    assert not log
+    assert list(matched) == []
+    assert log[-1].params == {'node_email': 'a@b.com'}
+
+
+def test_prefetch_query():
+    query, params = (Customer.match(email='a@b.com')
+                     .prefetch('orders', 'addresses').compile())
+    lines = query.split('\n')
+    assert lines[0].startswith('MATCH (node:')
+    assert lines[1:] == [
+        '    WHERE node.email = {node_email}',
+        'OPTIONAL MATCH (node)-[orders_rel:`PLACED_ORDER`]->(orders)',
+        'WITH node, COLLECT(orders) AS orders_collect',
+        'OPTIONAL MATCH (node)-[addresses_rel:`HAS_ADDRESS`]->(addresses)',
+        'WITH node, orders_collect, COLLECT(addresses) AS addresses_collect',
+        'RETURN node, orders_collect, addresses_collect',
+    ]
+    assert params == {'node_email': 'a@b.com'}
+
+
+def test_prefetch_backref_query():
+    query, _ = Order.match().prefetch('customer').compile()
+    assert ('OPTIONAL MATCH (customer)-[customer_rel:`PLACED_ORDER`]->(node)'
+            in query.split('\n'))
+
+
+def test_prefetch_unknown_relation():
+    with pytest.raises(ValueError):
+        Customer.match().prefetch('email')
+    # many-to-many backrefs aren't supported
+    with pytest.raises(ValueError):
+        Address.match().prefetch('customer')
+
+
+def test_prefetched_relations_need_no_queries():
+    order_id = '6f2a7a4e-45b9-4b7e-a3a4-3f4b8f6f0d6c'
+    records = [
+        Record(('node', 'orders_collect'), (
+            NeoNode(Customer.__node__.labels, {'email': 'a@b.com'}),
+            [NeoNode(Order.__node__.labels, {'id': order_id})],
+        )),
+        Record(('node', 'orders_collect'), (
+            NeoNode(Customer.__node__.labels, {'email': 'c@d.com'}), [],
+        )),
+    ]
+    results = Rehydrator(records, Customer.graph).prefetched(
+        ('PLACED_ORDER', False))
+    first, second = [record['node'] for record in results]
+    log = Customer.graph.query.log
+    log.clear()
+    order = first.orders.match().one
+    assert isinstance(order, Order)
+    assert str(order.id) == order_id
+    assert list(second.orders.match()) == []
+    assert not log
+    # filtered matches still go to the graph
+    list(first.orders.match(id=order_id))
+    assert len(log) == 1
+
+
+def test_prefetched_backref():
+    records = [Record(('node', 'customer_collect'), (
+        NeoNode(Order.__node__.labels, {}),
+        [NeoNode(Customer.__node__.labels, {'email': 'a@b.com'})],
+    ))]
+    order = next(Rehydrator(records, Order.graph)
+                 .prefetched(('PLACED_ORDER', True)))['node']
+    log = Order.graph.query.log
+    log.clear()
+    assert order.customer.email == 'a@b.com'
+    assert not log
+
+
+def test_relation_match_is_remembered():
+    customer = Customer(email='a@b.com')
+    order = Order()
+    log = Customer.graph.query.log
+    log.clear()
+    assert list(customer.orders.match()) == []
+    assert order.customer is None
+    assert len(log) == 2
+    list(customer.orders.match())
+    assert order.customer is None
+    assert len(log) == 2
+
+    customer.orders.merge(order)
+    assert len(log) == 3
+    list(customer.orders.match())
+    assert order.customer is None
+    assert len(log) == 5
+
+
+def test_refresh_relations():
+    customer = Customer(email='a@b.com')
+    log = Customer.graph.query.log
+    list(customer.orders.match())
+    log.clear()
+    list(customer.orders.refresh().match())
+    assert len(log) == 1
+    customer.refresh_relations('orders')
+    list(customer.orders.match())
+    assert len(log) == 2
+    customer.refresh_relations()
+    list(customer.orders.match())
+    assert len(log) == 3
+    with pytest.raises(ValueError):
+        customer.refresh_relations('email')
@@ -0,0 +1,75 @@
+"""OGM unit of work tests"""
+from neo4j.v1 import Node as NeoNode, Record
+import pytest
+
+from neoalchemy import OGMSession
+from neoalchemy.graph import Rehydrator
+from MockProject.customers import Customer
+from MockProject.orders import Order
+
+
+def load(graph, *emails):
+    records = [Record(('n',), (NeoNode(Customer.__node__.labels,
+                                       {'email': email}),))
+               for email in emails]
+    return [record['n'] for record in Rehydrator(records, graph)]
+
+
+def test_identity_map():
+    graph = Customer.graph
+    with OGMSession(graph) as session:
+        first, second, again = load(graph, 'a@x.com', 'b@x.com', 'a@x.com')
+        assert first is again
+        assert first is not second
+        assert session.get(Customer, email='a@x.com') is first
+    assert graph.identity_map is None
+    first, again = load(graph, 'a@x.com', 'a@x.com')
+    assert first is not again
+
+
+def test_flush_new_and_dirty():
+    graph = Customer.graph
+    log = graph.query.log
+    with OGMSession(graph) as session:
+        loaded, untouched = load(graph, 'a@x.com', 'b@x.com')
+        loaded.username = 'renamed'
+        session.add(Customer(email='c@x.com'), Customer(email='d@x.com'),
+                    Order())
+        assert len(session.new) == 3
+        assert session.dirty == [loaded]
+        log.clear()
+    created_customers, created_orders, merged = log
+    assert 'CREATE (node:' in created_customers.query
+    assert len(created_customers.params['rows']) == 2
+    assert len(created_orders.params['rows']) == 1
+    assert 'MERGE (node:' in merged.query
+    assert merged.params['rows'] == [{'email': 'a@x.com',
+                                      'username': 'renamed'}]
+    assert not session.new and not session.dirty
+    assert session.get(Customer, email='c@x.com').email == 'c@x.com'
+
+
+def test_second_flush_sends_nothing():
+    graph = Customer.graph
+    log = graph.query.log
+    with OGMSession(graph) as session:
+        customer = Customer(email='f@x.com')
+        customer.username = 'bob'
+        session.add(customer)
+        session.flush()
+        assert not session.new and not session.dirty
+        log.clear()
+        session.flush()
+        assert not log
+    assert not log
+
+
+def test_rollback_on_error():
+    graph = Customer.graph
+    graph.query.log.clear()
+    with pytest.raises(ValueError):
+        with OGMSession(graph) as session:
+            session.add(Customer(email='e@x.com'))
+            raise ValueError
+    assert not session.new
+    assert not graph.query.log
@@ -20,6 +20,40 @@ def test_date_validators():
         isodatetime('cat loaf')
 
 
+def test_iso_date_fast_path():
+    assert isodate('1985-03-24T22:50:00') == '1985-03-24'
+    assert isodatetime('1985-03-24') == '1985-03-24T00:00:00'
+    assert isodatetime('1985-03-24 22:50') == '1985-03-24T22:50:00'
+    assert isodatetime('1985-03-24T22:50:00.25Z') == \
+        '1985-03-24T22:50:00.250000+00:00'
+    assert isodatetime('1985-03-24T22:50:00-0500') == \
+        '1985-03-24T22:50:00-05:00'
+    with pytest.raises(ValueError):
+        isodate('1985-02-30')
+
+
+def test_memoize():
+    calls = []
+
+    def validator(value):
+        calls.append(value)
+        return isodate(value)
+
+    cached = memoize(validator, max_size=2)
+    assert cached('Mar 24, 1985') == '1985-03-24'
+    assert cached('Mar 24, 1985') == '1985-03-24'
+    assert calls == ['Mar 24, 1985']
+    cached('1985-03-25')
+    cached('1985-03-26')
+    assert len(cached.cache) == 2
+    cached('Mar 24, 1985')
+    assert len(calls) == 4
+    # unhashable values are validated without caching
+    assert memoize(len)([1, 2]) == 2
+    with pytest.raises(ValueError):
+        cached('chicken nugget')
+
+
 def test_uuid_validator():
     assert UUID(uuid.uuid1())
     assert UUID(uuid.uuid4())
@@ -0,0 +1,104 @@
+"""asyncio API tests"""
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5),
+                                reason='asyncio API requires Python 3.5+')
+
+from neo4j.v1 import Node as NeoNode, Record
+
+from neoalchemy import Graph
+from neoalchemy.graph import Rehydrator
+from MockProject.customers import Customer
+
+
+@pytest.fixture
+def loop():
+    import asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def test_query_run_async(loop):
+    graph = Customer.graph
+    result = loop.run_until_complete(graph.query.run_async('MATCH (n) '
+                                                           'RETURN n'))
+    assert result == ()
+    assert graph.query.log[-1].query == 'MATCH (n) RETURN n'
+
+
+def test_ogm_async(loop):
+    graph = Customer.graph
+    customer = Customer(username='seregon', email='seregon@gmail.com')
+    assert loop.run_until_complete(customer.create_async()) is customer
+    assert graph.query.log[-1].query.startswith('CREATE (node:')
+    loop.run_until_complete(customer.delete_async())
+    assert 'DETACH DELETE node' in graph.query.log[-1].query
+    results = loop.run_until_complete(Customer.match_async(email='x@y.com'))
+    assert isinstance(results, Rehydrator)
+    assert graph.query.log[-1].params == {'node_email': 'x@y.com'}
+
+
+def test_async_iteration(loop):
+    records = [Record(('n',), (NeoNode(Customer.__node__.labels,
+                                       {'email': '%i@x.com' % i}),))
+               for i in range(250)]
+    iterator = Rehydrator(records, Customer.graph).__aiter__()
+    emails = []
+    while True:
+        try:
+            record = loop.run_until_complete(iterator.__anext__())
+        except StopAsyncIteration:
+            break
+        emails.append(record['n'].email)
+    assert emails == ['%i@x.com' % i for i in range(250)]
+
+
+def test_async_match_iteration(loop):
+    async def match():
+        return [record async for record in Customer.match(email='m@x.com')]
+    assert loop.run_until_complete(match()) == []
+    assert Customer.graph.query.log[-1].params == {'node_email': 'm@x.com'}
+
+
+def test_limiter(loop):
+    limiter = Customer.graph.aio.limit(1)
+    assert loop.run_until_complete(limiter.run(sum, (1, 2))) == 3
+
+
+class FakeSession(object):
+    last_result = None
+    healthy = True
+
+    def run(self, query, parameters=None):
+        return iter([Record(('n',), (i,)) for i in range(3)])
+
+
+class FakeDriver(object):
+    def session(self):
+        return FakeSession()
+
+
+def test_open_stream_can_drain_while_pool_is_exhausted(loop):
+    import asyncio
+    graph = Graph(pool_size=1, pool_acquire_timeout=5)
+    graph.driver = FakeDriver()
+
+    async def handlers():
+        # A holds the only session; B's worker then blocks waiting for it
+        results = await graph.aio.run(graph.query.stream, 'MATCH (n) '
+                                                         'RETURN n')
+        waiting = asyncio.ensure_future(graph.query.run_async('RETURN 1'))
+        await asyncio.sleep(0.05)
+        assert graph.pool.stats.in_use == 1
+        assert [r['n'] async for r in results] == [0, 1, 2]
+        assert [r['n'] for r in await waiting] == [0, 1, 2]
+
+    loop.run_until_complete(asyncio.wait_for(handlers(), 2))
+    assert graph.pool.stats.in_use == 0
+    assert graph.pool.stats.waits == 1
+    graph.aio.shutdown()
@@ -3,6 +3,7 @@ import pytest
 
 from neoalchemy import Node, Property, Relationship
 from neoalchemy.exceptions import ImmutableAttributeError
+from neoalchemy.shared.objects import SetOnceDescriptor
 
 
 def test_property_set_once():
@@ -107,3 +108,13 @@ def test_relationship_set_once():
         del rel.start_node
     with pytest.raises(ImmutableAttributeError):
         del rel.end_node
+
+
+def test_values_stored_on_instance():
+    assert isinstance(Property.type, SetOnceDescriptor)
+    prop = Property(type=int)
+    assert vars(prop)['type'] is int
+    assert prop.name is None
+    prop.name = 'fred'
+    assert vars(prop)['name'] == 'fred'
+    assert Property().name is None